@@ -45,6 +45,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'users.apps.UsersConfig',
     'profiles.apps.ProfilesConfig',
@@ -62,6 +63,8 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 
+    # Server-Timing header and timing log for the search endpoints
+    'internships.middleware.ServerTimingMiddleware',
     'users.middleware.TokenAuthMiddleware',
     'users.middleware.ProfileCompletionMiddleware',
 
@@ -155,3 +158,155 @@ SPECTACULAR_SETTINGS = {
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Semantic search / embeddings
+
+# Concurrent generate_embedding() calls are gathered for up to
+# EMBEDDING_BATCH_WAIT_MS (or until EMBEDDING_BATCH_SIZE texts are queued)
+# and encoded in one forward pass.
+EMBEDDING_BATCHING = os.getenv('EMBEDDING_BATCHING', 'true').lower() == 'true'
+EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '32'))
+EMBEDDING_BATCH_WAIT_MS = float(os.getenv('EMBEDDING_BATCH_WAIT_MS', '5'))
+
+# Inference backend for the embedding model: 'torch' (float32),
+# 'torch-int8' (dynamically quantized) or 'onnx' (ONNX Runtime, needs
+# `pip install 'optimum[onnxruntime]'`). See internships/backends.py for
+# the parity tolerance of each backend.
+EMBEDDING_MODEL_NAME = os.getenv('EMBEDDING_MODEL_NAME', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch')
+# Local directory of an exported ONNX model, and the .onnx file inside it
+# (defaults to the export shipped with the model on the Hugging Face hub).
+EMBEDDING_ONNX_PATH = os.getenv('EMBEDDING_ONNX_PATH', '')
+EMBEDDING_ONNX_FILE = os.getenv('EMBEDDING_ONNX_FILE', '')
+
+# Persistent store of document embeddings keyed by a hash of the normalized
+# text and model version; Internship/StudentCV.update_embedding() look
+# vectors up there before calling the model.
+EMBEDDING_STORE_ENABLED = os.getenv('EMBEDDING_STORE_ENABLED', 'true').lower() == 'true'
+EMBEDDING_STORE_MAX_ENTRIES = int(os.getenv('EMBEDDING_STORE_MAX_ENTRIES', '200000'))
+
+# In-process LRU/TTL cache of query vectors shared by semantic_search,
+# hybrid_search, search_cvs and get_embedding (keyed on normalized text).
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '2048'))
+QUERY_EMBEDDING_CACHE_TTL = int(os.getenv('QUERY_EMBEDDING_CACHE_TTL', '3600'))  # seconds
+
+# Load and warm up the embedding model in InternshipsConfig.ready(). Run
+# gunicorn with --preload so this happens once in the master process and
+# the workers share the weights copy-on-write. /ready/ reports 503 until
+# the model is loaded.
+EMBEDDING_PRELOAD = os.getenv('EMBEDDING_PRELOAD', 'false').lower() == 'true'
+
+# Optional shared embedding sidecar (`manage.py embedding_server`). When the
+# socket path is set, web workers send encode requests there instead of
+# loading the model, and fall back to in-process encoding if it is down.
+EMBEDDING_SIDECAR_SOCKET = os.getenv('EMBEDDING_SIDECAR_SOCKET', '')
+EMBEDDING_SIDECAR_TIMEOUT = float(os.getenv('EMBEDDING_SIDECAR_TIMEOUT', '5'))  # seconds
+
+# Model input length in tokens. Texts longer than one window are truncated,
+# unless EMBEDDING_CHUNKING is on: then internship and CV texts are split
+# into overlapping windows whose vectors are pooled, so the sequence length
+# can be lowered for speed without losing most of a long posting.
+EMBEDDING_MAX_SEQ_LENGTH = int(os.getenv('EMBEDDING_MAX_SEQ_LENGTH', '128'))
+EMBEDDING_CHUNKING = os.getenv('EMBEDDING_CHUNKING', 'false').lower() == 'true'
+EMBEDDING_CHUNK_OVERLAP = int(os.getenv('EMBEDDING_CHUNK_OVERLAP', '16'))  # tokens
+
+# Zero-downtime embedding model switch (see `manage.py embedding_migration
+# --help`). While EMBEDDING_NEXT_MODEL_NAME is set, writes also store that
+# model's vector in the embedding_next columns; EMBEDDING_READ_NEXT flips
+# searches to those columns once the backfill has reached 100%. The next
+# model must also produce 384-dim vectors and always runs in-process.
+EMBEDDING_NEXT_MODEL_NAME = os.getenv('EMBEDDING_NEXT_MODEL_NAME', '')
+EMBEDDING_NEXT_BACKEND = os.getenv('EMBEDDING_NEXT_BACKEND', '')
+EMBEDDING_READ_NEXT = os.getenv('EMBEDDING_READ_NEXT', 'false').lower() == 'true'
+
+# Vector searches set hnsw.ef_search per query from the endpoint's profile
+# (internships.search.ANN_PROFILES). Iterative index scans, which keep
+# filtered searches from coming back short, need pgvector >= 0.8; turn
+# this off on older servers.
+PGVECTOR_ITERATIVE_SCAN = os.getenv('PGVECTOR_ITERATIVE_SCAN', 'true').lower() == 'true'
+
+# Where semantic search, similar internships and recommendations look up
+# nearest neighbours: 'pgvector' (HNSW index in Postgres) or 'numpy' (exact
+# search over a memory-mapped snapshot written by `manage.py
+# build_vector_index`, refreshed from the database every
+# VECTOR_INDEX_REFRESH_SECONDS). Rebuild the snapshot after bulk re-embeds.
+VECTOR_INDEX_BACKEND = os.getenv('VECTOR_INDEX_BACKEND', 'pgvector')
+VECTOR_INDEX_PATH = os.getenv('VECTOR_INDEX_PATH', str(BASE_DIR / 'var' / 'vector_index'))
+VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv('VECTOR_INDEX_REFRESH_SECONDS', '5'))
+
+# semantic_search pages through results with an opaque next_cursor (keyset
+# on distance, id); a search stops offering further pages after this many
+# results.
+SEMANTIC_SEARCH_MAX_DEPTH = int(os.getenv('SEMANTIC_SEARCH_MAX_DEPTH', '200'))
+
+# Defaults of the optional MMR re-rank (diversify=true) of semantic, hybrid
+# and similar-internship results: relevance weight between 0 (most diverse)
+# and 1 (plain ranking), and the cap on results from one company.
+DIVERSITY_LAMBDA = float(os.getenv('DIVERSITY_LAMBDA', '0.7'))
+DIVERSITY_MAX_PER_COMPANY = int(os.getenv('DIVERSITY_MAX_PER_COMPANY', '2'))
+
+# Search responses (list_internships, semantic_search, hybrid_search) are
+# cached per normalized query and filters, and invalidated by a catalogue
+# version that internship and company profile writes bump
+# (internships.result_cache). Point SEARCH_CACHE_URL at a Redis server
+# (needs the redis package) so all workers share entries and the version;
+# the cache is on by default only then. Without it, entries and version live
+# in a local-memory cache per process, bounded by SEARCH_CACHE_MAX_ENTRIES,
+# and a write only invalidates the worker that handled it: others serve
+# stale results for up to SEARCH_CACHE_TIMEOUT. Only enable that
+# (SEARCH_CACHE_ENABLED=true) for a single-process server.
+SEARCH_CACHE_URL = os.getenv('SEARCH_CACHE_URL', '')
+SEARCH_CACHE_ENABLED = os.getenv('SEARCH_CACHE_ENABLED', 'true' if SEARCH_CACHE_URL else 'false').lower() == 'true'
+SEARCH_CACHE_ALIAS = 'search'
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '5000'))
+SEARCH_CACHE_TIMEOUT = int(os.getenv('SEARCH_CACHE_TIMEOUT', '300'))  # seconds
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    SEARCH_CACHE_ALIAS: {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': SEARCH_CACHE_URL,
+        'TIMEOUT': SEARCH_CACHE_TIMEOUT,
+    } if SEARCH_CACHE_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'search-results',
+        'TIMEOUT': SEARCH_CACHE_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': SEARCH_CACHE_MAX_ENTRIES},
+    },
+}
+
+# Stage timings (embed, cache, db, hydrate, serialize, ...) of the vector
+# search endpoints are logged by internships.middleware (see LOGGING). With
+# this on they are also sent to clients in a Server-Timing header (browser
+# dev tools show them). Off by default: the header exposes backend timings
+# to every client, so only enable it for development or behind a trusted proxy.
+SERVER_TIMING_HEADER = os.getenv('SERVER_TIMING_HEADER', 'false').lower() == 'true'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timing': {
+            'format': '{asctime} {levelname} {name} {message}',
+            'style': '{',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'timing',
+        },
+    },
+    'loggers': {
+        # One record per timed request; the stages are also in the record's
+        # extra fields (stages_ms, total_ms) for structured handlers
+        'internships.middleware': {
+            'handlers': ['console'],
+            'level': os.getenv('SERVER_TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,26 @@
+"""
+Micro-benchmarks for the search and embedding paths.
+
+Run from the project root, e.g. `python -m benchmarks.embedding_seq_length`.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+
+def setup_django():
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'InternRealm.settings')
+    import django
+    django.setup()
+
+
+def timeit(fn, repeat=5):
+    """Best-of-`repeat` wall time of fn() in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
@@ -0,0 +1,54 @@
+"""
+Time of the MMR re-rank (internships.diversity.rerank) against candidate count.
+
+Candidates are synthetic: tight clusters of near-duplicate postings, one
+cluster per company, like the pages diversification is meant to break
+up. Reports best-of milliseconds per re-rank, including copying the
+vectors out of the result objects.
+"""
+import argparse
+from types import SimpleNamespace
+import numpy as np
+from benchmarks import setup_django, timeit
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from internships.diversity import rerank  # noqa: E402
+from internships.utils import embedding_field  # noqa: E402
+
+
+def clustered_results(count, companies, rng):
+    centres = rng.normal(size=(companies, 384))
+    company = rng.integers(0, companies, size=count)
+    vectors = centres[company] + 0.1 * rng.normal(size=(count, 384))
+    vectors = (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+    field = embedding_field()
+    return [
+        SimpleNamespace(**{field: vector, 'company_id': int(company_id)})
+        for vector, company_id in zip(vectors, company)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--candidates', default='50,100,200,400')
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--companies', type=int, default=15)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    options = {'lambda': settings.DIVERSITY_LAMBDA, 'max_per_company': settings.DIVERSITY_MAX_PER_COMPANY}
+    print(f"{'candidates':>10} {'k':>4} {'rerank ms':>10} {'companies in page':>18}")
+    for count in (int(n) for n in args.candidates.split(',')):
+        results = clustered_results(count, args.companies, rng)
+        query = getattr(results[0], embedding_field())
+        elapsed = timeit(lambda: rerank(query, results, args.k, options), args.repeat)
+        page, _ = rerank(query, results, args.k, options)
+        companies = len({result.company_id for result in page})
+        print(f"{count:>10} {args.k:>4} {elapsed:>10.3f} {companies:>18}")
+
+
+if __name__ == '__main__':
+    main()
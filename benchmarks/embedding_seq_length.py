@@ -0,0 +1,47 @@
+"""
+Encode latency against max_seq_length, truncated vs. chunked.
+
+For each sequence length, encodes a batch of long internship-like texts
+once with plain truncation and once with chunking + pooling, and reports
+milliseconds per text.
+"""
+import argparse
+from benchmarks import setup_django, timeit
+
+setup_django()
+
+from django.test import override_settings  # noqa: E402
+from internships.chunking import embed_chunked  # noqa: E402
+from internships.utils import get_embedding_model  # noqa: E402
+
+PARAGRAPH = (
+    "We are looking for a motivated intern to join our data engineering team. "
+    "You will build ETL pipelines in Python and SQL, maintain dashboards, and "
+    "work with product managers to define metrics. Experience with pandas, "
+    "Airflow or dbt is a plus; curiosity and clear communication are required. "
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--texts', type=int, default=32)
+    parser.add_argument('--paragraphs', type=int, default=6, help="Paragraphs per text")
+    parser.add_argument('--lengths', default='32,64,128,256')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [PARAGRAPH * args.paragraphs + f" Ref {i}." for i in range(args.texts)]
+    model = get_embedding_model()
+    encode = lambda batch: model.encode(batch, batch_size=64)
+
+    print(f"{'seq_len':>8} {'truncate ms/text':>18} {'chunked ms/text':>17}")
+    for length in (int(n) for n in args.lengths.split(',')):
+        model.max_seq_length = length
+        with override_settings(EMBEDDING_MAX_SEQ_LENGTH=length):
+            truncated = timeit(lambda: encode(texts), args.repeat)
+            chunked = timeit(lambda: embed_chunked(texts, encode), args.repeat)
+        print(f"{length:>8} {truncated / len(texts):>18.2f} {chunked / len(texts):>17.2f}")
+
+
+if __name__ == '__main__':
+    main()
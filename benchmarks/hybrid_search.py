@@ -0,0 +1,56 @@
+"""
+Vector-only search against reciprocal rank fusion of keyword + vector search.
+
+For each query, runs the previous semantic search (ANN over published
+internships, location filter applied to the queryset) and the RRF hybrid
+search, and reports best-of latency in milliseconds and how many of the
+hybrid results the vector-only page also returned.
+"""
+import argparse
+from benchmarks import setup_django, timeit
+
+setup_django()
+
+from internships.hybrid import hybrid_search  # noqa: E402
+from internships.models import Internship  # noqa: E402
+from internships.search import ann_search  # noqa: E402
+from internships.utils import embed_query  # noqa: E402
+
+QUERIES = [
+    "python backend developer",
+    "data analyst sql dashboards",
+    "marketing intern social media",
+    "machine learning research",
+    "react frontend",
+]
+
+
+def vector_only(text, vector, limit, location):
+    queryset = Internship.objects.filter(status='published')
+    if location:
+        queryset = queryset.filter(location__icontains=location)
+    return ann_search(queryset, vector, limit, profile='filtered')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--queries', help="Comma-separated queries (default: a built-in set)")
+    parser.add_argument('--location')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    queries = args.queries.split(',') if args.queries else QUERIES
+    print(f"{'query':<32} {'vector ms':>10} {'hybrid ms':>10} {'overlap':>8}")
+    for text in queries:
+        vector = embed_query(text)
+        vector_ms = timeit(lambda: vector_only(text, vector, args.limit, args.location), args.repeat)
+        hybrid_ms = timeit(lambda: hybrid_search(text, vector, args.limit, args.location), args.repeat)
+        vector_ids = {row.id for row in vector_only(text, vector, args.limit, args.location)}
+        hybrid_ids = [row.id for row in hybrid_search(text, vector, args.limit, args.location)]
+        overlap = sum(row_id in vector_ids for row_id in hybrid_ids)
+        print(f"{text[:32]:<32} {vector_ms:>10.2f} {hybrid_ms:>10.2f} {overlap:>4}/{len(hybrid_ids):<3}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Django startup cost: what gets imported before the first request.
+
+Boots Django in a fresh interpreter under `python -X importtime`, imports
+the URLconf (and with it every view, serializer and signal handler),
+then reports the total startup time and the slowest top-level packages.
+Fails if the ML stack (torch, sentence_transformers, transformers) was
+imported: it must only load when something is actually encoded. Run it
+where torch and sentence_transformers are installed; without them that
+check passes trivially and the timings say nothing about the ML stack.
+
+    python -m benchmarks.import_time --output benchmarks/results/import_time_after.txt
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ML_PACKAGES = ('torch', 'sentence_transformers', 'transformers')
+
+BOOT = """
+import os, sys, time
+started = time.perf_counter()
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'InternRealm.settings')
+import django
+django.setup()
+import InternRealm.urls
+print(f"{(time.perf_counter() - started) * 1000:.1f}")
+print(','.join(sorted(name for name in sys.modules if name.split('.')[0] in %r)))
+""" % (ML_PACKAGES,)
+
+
+def boot():
+    """Run BOOT under -X importtime; returns (wall ms, ML modules loaded, importtime lines)."""
+    env = dict(os.environ, EMBEDDING_PRELOAD='false')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', BOOT],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    wall_ms, loaded = result.stdout.split('\n')[-3:-1]
+    lines = [line for line in result.stderr.splitlines() if line.startswith('import time:')]
+    return float(wall_ms), [name for name in loaded.split(',') if name], lines
+
+
+def by_package(lines):
+    """Self time in ms per top-level package."""
+    totals = defaultdict(float)
+    for line in lines[1:]:  # skip the header
+        self_us, _, name = line.split(':', 1)[1].split('|')
+        totals[name.strip().split('.')[0]] += int(self_us) / 1000
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output', help="Also write the raw -X importtime log here")
+    args = parser.parse_args()
+
+    wall_ms, loaded, lines = boot()
+
+    print(f"startup: {wall_ms:.1f} ms, {len(lines) - 1} modules")
+    print(f"{'package':<30} {'self ms':>10}")
+    for name, ms in by_package(lines)[:args.top]:
+        print(f"{name:<30} {ms:>10.1f}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text('\n'.join(lines) + '\n')
+
+    if loaded:
+        packages = sorted({name.split('.')[0] for name in loaded})
+        sys.exit(f"ML stack imported at startup: {', '.join(packages)} ({len(loaded)} modules)")
+
+
+if __name__ == '__main__':
+    main()
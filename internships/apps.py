@@ -7,7 +7,10 @@ class InternshipsConfig(AppConfig):
 
     def ready(self):
         import internships.signals
-        # Warm up model when Django starts
-        from .utils import generate_embedding
-        generate_embedding("warmup")  # Initial load
-        print("✅ Semantic model preloaded")
+        from django.conf import settings
+        # Warm up model when Django starts (opt-in, see EMBEDDING_PRELOAD).
+        # With an embedding sidecar the model lives there instead.
+        if settings.EMBEDDING_PRELOAD and not settings.EMBEDDING_SIDECAR_SOCKET:
+            from .utils import preload_embedding_model
+            preload_embedding_model(freeze=True)
+            print("✅ Semantic model preloaded")
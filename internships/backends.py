@@ -0,0 +1,129 @@
+"""
+Inference backends for the sentence embedding model.
+
+All backends load the same checkpoint and return float32 vectors of the
+same dimension (384 for paraphrase-multilingual-MiniLM-L12-v2), scaled to
+unit length so that inner product equals cosine similarity. Vectors
+from the optimized backends are not bit-identical to plain PyTorch; the
+minimum cosine similarity to the PyTorch vector of the same text is
+documented in PARITY_TOLERANCE and checked by the parity tests.
+"""
+from django.core.exceptions import ImproperlyConfigured
+import numpy as np
+
+
+# Minimum cosine similarity between a backend's vector and the float32
+# PyTorch vector for the same text.
+PARITY_TOLERANCE = {
+    'torch': 0.99999,
+    'torch-int8': 0.98,
+    'onnx': 0.999,
+}
+
+
+def l2_normalize(vectors):
+    """Scale every row to unit length."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class TorchBackend:
+    """Plain float32 PyTorch on CPU."""
+    name = 'torch'
+
+    def __init__(self, model_name, **options):
+        self.model_name = model_name
+        self.options = options
+        self.model = self.load()
+
+    def load(self):
+        # Imported here, not at module level: sentence_transformers pulls in
+        # torch, which costs seconds and hundreds of MB at Django startup
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(self.model_name, device='cpu')
+
+    @property
+    def version(self):
+        return f"{self.model_name}@{self.name}"
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    @property
+    def tokenizer(self):
+        return self.model.tokenizer
+
+    @property
+    def max_seq_length(self):
+        return self.model.max_seq_length
+
+    @max_seq_length.setter
+    def max_seq_length(self, value):
+        self.model.max_seq_length = value
+
+    def encode(self, texts, batch_size=32):
+        vectors = self.model.encode(
+            list(texts),
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return np.asarray(vectors, dtype=np.float32)
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch with the Linear layers dynamically quantized to int8."""
+    name = 'torch-int8'
+
+    def load(self):
+        import torch
+
+        model = super().load()
+        # Quantize in place so the float32 weights are not kept alongside
+        torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+        return model
+
+
+class OnnxBackend(TorchBackend):
+    """ONNX Runtime session (requires `optimum[onnxruntime]`)."""
+    name = 'onnx'
+
+    def load(self):
+        from sentence_transformers import SentenceTransformer
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            raise ImproperlyConfigured(
+                "EMBEDDING_BACKEND='onnx' requires onnxruntime: "
+                "pip install 'optimum[onnxruntime]'"
+            )
+        model_kwargs = {'provider': 'CPUExecutionProvider'}
+        if self.options.get('onnx_file'):
+            model_kwargs['file_name'] = self.options['onnx_file']
+        return SentenceTransformer(
+            self.options.get('onnx_path') or self.model_name,
+            device='cpu',
+            backend='onnx',
+            model_kwargs=model_kwargs
+        )
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (TorchBackend, QuantizedTorchBackend, OnnxBackend)
+}
+
+
+def load_backend(name, model_name, **options):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown EMBEDDING_BACKEND '{name}'. "
+            f"Choose one of: {', '.join(sorted(BACKENDS))}"
+        )
+    return backend_class(model_name, **options)
@@ -0,0 +1,138 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching queue in front of an encode function.
+
+    Concurrent callers of `submit` are gathered for at most `max_wait_ms`
+    (or until `max_batch_size` texts are waiting) and encoded in a single
+    call to `encode_fn`, which takes a list of texts and returns one vector
+    per text. Each caller gets back its own row.
+    """
+
+    def __init__(self, encode_fn, max_batch_size=32, max_wait_ms=5, timeout=30.0):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._worker = None
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self._stats = {
+            'batches': 0,
+            'items': 0,
+            'max_batch_size': 0,
+            'batch_size_histogram': {},
+            'queue_wait_ms_total': 0.0,
+            'queue_wait_ms_max': 0.0,
+            'encode_ms_total': 0.0,
+            'errors': 0,
+        }
+
+    def _ensure_worker(self):
+        # The worker thread does not survive a fork, so every process
+        # (e.g. each gunicorn worker) starts its own on first use.
+        pid = os.getpid()
+        if self._pid == pid and self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._pid == pid and self._worker is not None and self._worker.is_alive():
+                return
+            if self._pid != pid:
+                self._reset_stats()
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(
+                target=self._run, name='embedding-batcher', daemon=True
+            )
+            self._pid = pid
+            self._worker.start()
+
+    def submit(self, text):
+        """Queue one text and block until its vector is ready."""
+        return self.submit_many([text])[0]
+
+    def submit_many(self, texts):
+        """Queue several texts at once; they may be batched with other callers'."""
+        self._ensure_worker()
+        futures = []
+        enqueued = time.perf_counter()
+        for text in texts:
+            future = Future()
+            self._queue.put((text, enqueued, future))
+            futures.append(future)
+        return [future.result(timeout=self.timeout) for future in futures]
+
+    def _collect(self):
+        first = self._queue.get()
+        batch = [first]
+        deadline = first[1] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = self.encode_fn(texts)
+            except Exception as e:
+                with self._lock:
+                    self._stats['errors'] += 1
+                for _, _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            for (_, _, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            self._record(batch, started, finished)
+
+    def _record(self, batch, started, finished):
+        size = len(batch)
+        waits = [(started - enqueued) * 1000 for _, enqueued, _ in batch]
+        bucket = 1 << (size - 1).bit_length()  # 1, 2, 4, 8, ...
+        with self._lock:
+            stats = self._stats
+            stats['batches'] += 1
+            stats['items'] += size
+            stats['max_batch_size'] = max(stats['max_batch_size'], size)
+            stats['batch_size_histogram'][bucket] = stats['batch_size_histogram'].get(bucket, 0) + 1
+            stats['queue_wait_ms_total'] += sum(waits)
+            stats['queue_wait_ms_max'] = max(stats['queue_wait_ms_max'], max(waits))
+            stats['encode_ms_total'] += (finished - started) * 1000
+        logger.debug(
+            "Encoded batch of %d texts in %.1f ms (max queue wait %.1f ms)",
+            size, (finished - started) * 1000, max(waits)
+        )
+
+    def stats(self):
+        """Batch-size and queue-wait metrics for this process."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['batch_size_histogram'] = dict(stats['batch_size_histogram'])
+        batches = stats['batches'] or 1
+        items = stats['items'] or 1
+        stats['mean_batch_size'] = stats['items'] / batches
+        stats['queue_wait_ms_mean'] = stats['queue_wait_ms_total'] / items
+        stats['encode_ms_mean'] = stats['encode_ms_total'] / batches
+        return stats
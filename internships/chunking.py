@@ -0,0 +1,86 @@
+"""
+Long-text chunking for document embeddings.
+
+The model truncates its input at max_seq_length tokens, so a long posting
+or CV would only be represented by its first few sentences. Texts longer
+than one window are split into overlapping token windows, every window of
+every text is encoded in one batch, and the window vectors are pooled
+(token-weighted mean of unit vectors, rescaled to unit length) into one
+vector per text.
+"""
+from functools import lru_cache
+from django.conf import settings
+from .backends import l2_normalize
+import numpy as np
+
+# [CLS] and [SEP] take two positions of every window
+SPECIAL_TOKENS = 2
+
+
+@lru_cache(maxsize=None)
+def get_tokenizer(model_name):
+    # Only the tokenizer is loaded, so this works in workers that use the
+    # embedding sidecar and never load the model weights
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(model_name)
+
+
+def window_size():
+    return settings.EMBEDDING_MAX_SEQ_LENGTH - SPECIAL_TOKENS
+
+
+def chunk_text(text, tokenizer, max_tokens, overlap=0):
+    """
+    Split `text` into windows of at most `max_tokens` tokens.
+
+    Returns (chunk, token_count) pairs; chunks are slices of the original
+    text, cut at token boundaries.
+    """
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False
+    )
+    offsets = encoding['offset_mapping']
+    if len(offsets) <= max_tokens:
+        return [(text, max(len(offsets), 1))]
+
+    overlap = min(overlap, max_tokens // 2)
+    step = max_tokens - overlap
+    chunks = []
+    for start in range(0, len(offsets), step):
+        window = offsets[start:start + max_tokens]
+        chunks.append((text[window[0][0]:window[-1][1]], len(window)))
+        if start + max_tokens >= len(offsets):
+            break
+    return chunks
+
+
+def pool(vectors, weights):
+    units = l2_normalize(vectors)
+    weights = np.asarray(weights, dtype=np.float32)
+    return (units * weights[:, None]).sum(axis=0) / weights.sum()
+
+
+def embed_chunked(texts, encode, model_name=None):
+    """Chunk every text, encode all chunks with one `encode` call and pool per text."""
+    tokenizer = get_tokenizer(model_name or settings.EMBEDDING_MODEL_NAME)
+    per_text = [
+        chunk_text(text, tokenizer, window_size(), settings.EMBEDDING_CHUNK_OVERLAP)
+        for text in texts
+    ]
+    flat = [chunk for chunks in per_text for chunk, _ in chunks]
+    vectors = encode(flat)
+
+    pooled = []
+    offset = 0
+    for chunks in per_text:
+        count = len(chunks)
+        if count == 1:
+            pooled.append(np.asarray(vectors[offset], dtype=np.float32))
+        else:
+            pooled.append(pool(vectors[offset:offset + count], [n for _, n in chunks]))
+        offset += count
+    # The mean of unit vectors is shorter than one; stored vectors must be unit length
+    return l2_normalize(np.stack(pooled)) if pooled else np.empty((0, 0), dtype=np.float32)
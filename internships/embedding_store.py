@@ -0,0 +1,136 @@
+"""
+Persistent embedding store.
+
+Document embeddings (internships, CVs) are looked up by a hash of the
+normalized text and the model version before the model is called, so
+unchanged or duplicated texts never get encoded twice. The table is kept
+under EMBEDDING_STORE_MAX_ENTRIES by evicting the least recently used rows.
+"""
+import hashlib
+import threading
+import unicodedata
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+import numpy as np
+from .models import StoredEmbedding
+from .utils import (
+    CURRENT, NEXT, document_embedding_version, generate_document_embeddings, next_model_enabled
+)
+
+# Only refresh last_used_at when it is older than this, so hits stay read-only
+TOUCH_INTERVAL = timedelta(hours=1)
+# Check the table size once every this many inserts (per process)
+EVICTION_CHECK_EVERY = 100
+
+_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+_inserts_since_check = 0
+
+
+def normalize_text(text):
+    return ' '.join(unicodedata.normalize('NFKC', text or '').split())
+
+
+def content_key(text, version):
+    payload = f"{version}\0{normalize_text(text)}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def embed_documents(texts, slot=CURRENT):
+    """Return one vector per text, encoding only the texts not in the store."""
+    if not settings.EMBEDDING_STORE_ENABLED:
+        return list(generate_document_embeddings(texts, slot))
+
+    version = document_embedding_version(slot)
+    keys = [content_key(text, version) for text in texts]
+    found = dict(
+        StoredEmbedding.objects.filter(key__in=set(keys)).values_list('key', 'embedding')
+    )
+
+    missing = {}  # key -> text, one entry per distinct text
+    for key, text in zip(keys, texts):
+        if key not in found:
+            missing.setdefault(key, text)
+
+    if missing:
+        vectors = generate_document_embeddings(list(missing.values()), slot)
+        new_entries = []
+        for key, vector in zip(missing, vectors):
+            found[key] = vector
+            new_entries.append(StoredEmbedding(key=key, model_version=version, embedding=vector))
+        StoredEmbedding.objects.bulk_create(new_entries, ignore_conflicts=True)
+        _maybe_evict(len(new_entries))
+
+    hit_keys = set(keys) - set(missing)
+    if hit_keys:
+        now = timezone.now()
+        StoredEmbedding.objects.filter(
+            key__in=hit_keys, last_used_at__lt=now - TOUCH_INTERVAL
+        ).update(last_used_at=now)
+
+    with _lock:
+        _stats['hits'] += len(keys) - len(missing)
+        _stats['misses'] += len(missing)
+
+    return [np.asarray(found[key], dtype=np.float32) for key in keys]
+
+
+def embed_document(text, slot=CURRENT):
+    return embed_documents([text], slot)[0]
+
+
+# Every field assign_embeddings() can set: post_save receivers recognise
+# the embedding-only saves by update_fields being a subset of these
+EMBEDDING_FIELDS = {'embedding', 'embedding_version', 'embedding_next', 'embedding_next_version', 'updated_at'}
+
+
+def assign_embeddings(instance, text):
+    """
+    Set the embedding fields of an Internship or StudentCV from `text`.
+
+    While a model migration is in progress the NEXT vector is written too
+    (dual-write), so the shadow column never falls behind the live one.
+    Returns the names of the fields that were set, for save(update_fields=...),
+    a subset of EMBEDDING_FIELDS.
+    """
+    instance.embedding = embed_document(text)
+    instance.embedding_version = document_embedding_version()
+    fields = ['embedding', 'embedding_version']
+    if next_model_enabled():
+        instance.embedding_next = embed_document(text, NEXT)
+        instance.embedding_next_version = document_embedding_version(NEXT)
+        fields += ['embedding_next', 'embedding_next_version']
+    # Bump updated_at (auto_now) with the vector: in-memory vector indexes
+    # poll it to pick up changed rows
+    if any(field.name == 'updated_at' for field in instance._meta.fields):
+        fields.append('updated_at')
+    return fields
+
+
+def _maybe_evict(inserted):
+    global _inserts_since_check
+    with _lock:
+        _inserts_since_check += inserted
+        if _inserts_since_check < EVICTION_CHECK_EVERY:
+            return
+        _inserts_since_check = 0
+
+    limit = settings.EMBEDDING_STORE_MAX_ENTRIES
+    overflow = StoredEmbedding.objects.count() - limit
+    if overflow <= 0:
+        return
+    # Evict down to 90% of the limit so we don't evict on every check
+    to_delete = overflow + limit // 10
+    stale_ids = StoredEmbedding.objects.order_by('last_used_at').values('id')[:to_delete]
+    deleted, _ = StoredEmbedding.objects.filter(id__in=stale_ids).delete()
+    with _lock:
+        _stats['evictions'] += deleted
+
+
+def store_stats():
+    with _lock:
+        stats = dict(_stats)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+    return stats
@@ -0,0 +1,121 @@
+"""
+The internship filter vocabulary shared by list_internships and semantic_search.
+
+parse_filters() turns request parameters (a QueryDict, or the parsed JSON
+body) into one Q object that is applied in the same WHERE clause as the
+keyword or vector search, so results are never filtered after the fact.
+The partial indexes on published internships (see Internship.Meta)
+cover the common combinations.
+"""
+from decimal import Decimal, InvalidOperation
+from django.contrib.postgres.lookups import TrigramSimilar
+from django.contrib.postgres.search import TrigramSimilarity
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator, validate_integer
+from django.db.models import Q
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+LOCATION_TYPES = ['exact match (use quotes)', 'contains', 'similar spelling (prefix with ~)', 'remote']
+
+
+class InternshipFilters:
+    def __init__(self, q, params, fuzzy_location=None):
+        self.q = q
+        # Normalized values, e.g. for cache keys
+        self.params = params
+        # Upper-cased target of a ~location filter
+        self.fuzzy_location = fuzzy_location
+
+    def __bool__(self):
+        return bool(self.params)
+
+    def apply(self, queryset):
+        """Filter `queryset`; a fuzzy location also annotates `location_similarity`."""
+        if self.fuzzy_location:
+            queryset = queryset.annotate(
+                location_similarity=TrigramSimilarity(Upper('location'), self.fuzzy_location)
+            )
+        return queryset.filter(self.q)
+
+
+def _flag(value):
+    return str(value).lower() == 'true'
+
+
+def parse_filters(data):
+    """
+    Compile the filters in `data` into an InternshipFilters.
+
+    Raises ValidationError with a client-facing message for malformed values.
+    """
+    filters = Q()
+    params = {}
+    fuzzy_location = None
+
+    # 1. Location (exact, contains, fuzzy or remote). All but remote are
+    # served by the trigram index on UPPER(location)
+    location = str(data.get('location') or '').strip()
+    if location:
+        params['location'] = location.casefold()
+        if location.lower() == 'remote':
+            filters &= Q(remote_option=True)
+        elif location.startswith('"') and location.endswith('"'):
+            # Exact match for quoted locations (e.g., "New York")
+            filters &= Q(location__iexact=location.strip('"'))
+        elif location.startswith('~') and location[1:].strip():
+            # Similar spelling (e.g., ~Pariss)
+            fuzzy_location = location[1:].strip().upper()
+            filters &= Q(TrigramSimilar(Upper('location'), fuzzy_location))
+        else:
+            filters &= Q(location__icontains=location)
+
+    # 2. Duration (min and max)
+    try:
+        for name, lookup in (('min_duration', 'gte'), ('max_duration', 'lte')):
+            value = data.get(name)
+            if value not in (None, ''):
+                validate_integer(value)
+                params[name] = int(value)
+                filters &= Q(**{f'duration_months__{lookup}': int(value)})
+    except ValidationError:
+        raise ValidationError('Duration must be a positive integer')
+
+    # 3. Paid status and salary
+    is_paid = data.get('is_paid')
+    if is_paid is not None and str(is_paid).lower() in ['true', 'false']:
+        params['is_paid'] = _flag(is_paid)
+        filters &= Q(is_paid=_flag(is_paid))
+
+    min_salary = data.get('min_salary')
+    if min_salary not in (None, ''):
+        try:
+            min_salary = Decimal(str(min_salary))
+            DecimalValidator(10, 2)(min_salary)
+        except (ValidationError, InvalidOperation):
+            raise ValidationError('Minimum salary must be a valid number')
+        params['min_salary'] = str(min_salary)
+        filters &= Q(salary__gte=min_salary)
+
+    # 4. Company
+    company_id = data.get('company_id')
+    if company_id not in (None, ''):
+        try:
+            validate_integer(company_id)
+        except ValidationError:
+            raise ValidationError('Invalid company ID')
+        params['company_id'] = int(company_id)
+        filters &= Q(company_id=int(company_id))
+
+    # 5. Remote (can be combined with location)
+    if _flag(data.get('remote_only')):
+        params['remote_only'] = True
+        filters &= Q(remote_option=True)
+
+    # 6. Deadline not passed yet
+    if _flag(data.get('upcoming_only')):
+        today = timezone.now().date()
+        params['upcoming_only'] = today.isoformat()
+        filters &= Q(application_deadline__gte=today)
+
+    return InternshipFilters(filters, params, fuzzy_location)
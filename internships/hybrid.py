@@ -0,0 +1,97 @@
+"""
+Hybrid keyword + semantic search with reciprocal rank fusion (RRF).
+
+One SQL statement retrieves two candidate lists, the best full-text
+matches (GIN index on search_vector) and the nearest vectors (HNSW
+index), and fuses them: every internship scores
+sum(1 / (RRF_K + rank)) over the lists it appears in. Ranks rather than
+raw scores are combined, so ts_rank and cosine similarity, which live
+on unrelated scales, need no calibration. The fused page is joined back
+to the internship and company rows in the same statement.
+"""
+from django.db import connection
+from .models import Internship
+from .search import hnsw_settings, profile_options, vector_literal
+from .timing import fetch
+from .utils import embedding_field
+
+# Dampens the weight of the top ranks; 60 is the value from the original
+# RRF paper and works well without tuning
+RRF_K = 60
+
+# Candidates taken from each list before fusing
+CANDIDATES = 100
+
+
+def hybrid_search(text, vector, limit=20, location=None, candidates=CANDIDATES):
+    """
+    Published internships matching `text` by keywords and/or meaning, best first.
+
+    Returns Internship instances with their vector, `score` (fused RRF
+    score), `company_name`, and the per-signal `keyword_rank`, `keyword_score`,
+    `semantic_rank` and `semantic_score` (None where the internship was
+    not a candidate of that signal).
+    """
+    table = connection.ops.quote_name(Internship._meta.db_table)
+    company_table = connection.ops.quote_name(Internship._meta.get_field('company').related_model._meta.db_table)
+    field = connection.ops.quote_name(embedding_field())
+
+    # Literal predicate of the partial HNSW index, so the planner can use it
+    filters = "status = 'published'"
+    filter_params = []
+    if location:
+        # Same expression as location__icontains: served by the trigram index
+        filters += " AND UPPER(location::text) LIKE UPPER(%s)"
+        filter_params.append(f"%{connection.ops.prep_for_like_query(location)}%")
+
+    query_vector = vector_literal(vector)
+    sql = f"""
+        WITH keyword AS (
+            SELECT id, score, row_number() OVER (ORDER BY score DESC, id) AS rank
+            FROM (
+                SELECT id, ts_rank_cd(search_vector, query) AS score
+                FROM {table}, websearch_to_tsquery('simple', %s) AS query
+                WHERE {filters} AND search_vector @@ query
+                ORDER BY score DESC, id
+                LIMIT %s
+            ) AS matches
+        ),
+        semantic AS (
+            SELECT id, -distance AS score, row_number() OVER (ORDER BY distance, id) AS rank
+            FROM (
+                SELECT id, {field} <#> %s::vector AS distance
+                FROM {table}
+                WHERE {filters} AND {field} IS NOT NULL
+                ORDER BY distance
+                LIMIT %s
+            ) AS nearest
+        ),
+        fused AS (
+            SELECT
+                COALESCE(keyword.id, semantic.id) AS id,
+                COALESCE(1.0 / (%s + keyword.rank), 0) + COALESCE(1.0 / (%s + semantic.rank), 0) AS score,
+                keyword.rank AS keyword_rank,
+                keyword.score AS keyword_score,
+                semantic.rank AS semantic_rank,
+                semantic.score AS semantic_score
+            FROM keyword FULL OUTER JOIN semantic ON keyword.id = semantic.id
+            ORDER BY score DESC, id
+            LIMIT %s
+        )
+        SELECT {table}.id, {table}.title, {table}.description, {table}.location, {table}.company_id,
+               {table}.{field}, company.company_name, fused.score, fused.keyword_rank,
+               fused.keyword_score, fused.semantic_rank, fused.semantic_score
+        FROM fused
+        JOIN {table} ON {table}.id = fused.id
+        JOIN {company_table} AS company ON company.id = {table}.company_id
+        ORDER BY fused.score DESC, fused.id
+    """
+    params = (
+        [text, *filter_params, candidates]
+        + [query_vector, *filter_params, candidates]
+        + [RRF_K, RRF_K, limit]
+    )
+    # The vector candidates come from the HNSW index; tune it like the
+    # other filtered searches
+    with fetch(), hnsw_settings(connection.alias, **profile_options('filtered', candidates)):
+        return list(Internship.objects.raw(sql, params))
@@ -0,0 +1,114 @@
+"""
+Precomputed "similar internships" graph.
+
+build_graph() finds, for every published internship with a vector, its K
+most similar published internships and replaces the SimilarInternship
+table. The similarity matrix is computed one block of rows at a time (a
+block_size x N matrix product), so memory stays bounded at any corpus
+size. Between builds, update_neighbours() patches the graph around a
+single internship whose vector or status changed; the nightly rebuild
+(`manage.py build_similar_internships`) corrects whatever the local
+updates approximate.
+"""
+from django.db import transaction
+from django.db.models import Count, Min, Q
+import numpy as np
+from .models import PUBLISHED_ONLY, Internship, SimilarInternship
+from .utils import embedding_field
+from .vector_index import get_vector_index
+
+K = 20
+
+
+def published_vectors(field):
+    rows = list(
+        Internship.objects.filter(PUBLISHED_ONLY)
+        .exclude(**{f'{field}__isnull': True})
+        .order_by('id')
+        .values_list('id', field)
+    )
+    ids = np.array([row_id for row_id, _ in rows], dtype=np.int64)
+    vectors = np.array([vector for _, vector in rows], dtype=np.float32).reshape(len(rows), -1)
+    return ids, vectors
+
+
+def top_k_blocks(vectors, k, block_size=256):
+    """
+    Yield (row, neighbour rows, scores) for every row of `vectors`, best
+    first and without the row itself.
+    """
+    k = min(k, len(vectors) - 1)
+    if k <= 0:
+        return
+    for start in range(0, len(vectors), block_size):
+        scores = vectors[start:start + block_size] @ vectors.T
+        rows = np.arange(len(scores))
+        scores[rows, start + rows] = -np.inf
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, best, axis=1)
+        order = np.argsort(-best_scores, axis=1)
+        best = np.take_along_axis(best, order, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        for row in rows:
+            yield start + row, best[row], best_scores[row]
+
+
+def build_graph(k=K, block_size=256, batch_size=5000):
+    """Recompute the whole graph; returns the number of internships covered."""
+    ids, vectors = published_vectors(embedding_field())
+    with transaction.atomic():
+        # Readers keep seeing the previous graph until this commits
+        SimilarInternship.objects.all().delete()
+        batch = []
+        for row, neighbours, scores in top_k_blocks(vectors, k, block_size):
+            batch.extend(
+                SimilarInternship(internship_id=ids[row], similar_id=ids[n], score=float(score))
+                for n, score in zip(neighbours, scores)
+            )
+            if len(batch) >= batch_size:
+                SimilarInternship.objects.bulk_create(batch)
+                batch = []
+        SimilarInternship.objects.bulk_create(batch)
+    return len(ids)
+
+
+def update_neighbours(internship, k=K):
+    """
+    Patch the graph after `internship`'s vector or status changed.
+
+    Its own list is recomputed. It is removed from every other list, then
+    added back to the lists of its own neighbours wherever it beats their
+    current k-th entry. Lists it drops out of keep k - 1 entries until the
+    next build.
+    """
+    vector = getattr(internship, embedding_field())
+    with transaction.atomic():
+        SimilarInternship.objects.filter(Q(internship=internship) | Q(similar=internship)).delete()
+        if internship.status != 'published' or vector is None:
+            return
+
+        neighbours = get_vector_index().search(vector, k, exclude=[internship.id], profile='fast')
+        SimilarInternship.objects.bulk_create([
+            SimilarInternship(internship=internship, similar=neighbour, score=neighbour.similarity)
+            for neighbour in neighbours
+        ])
+
+        lists = {
+            row['internship_id']: row
+            for row in SimilarInternship.objects.filter(
+                internship_id__in=[neighbour.id for neighbour in neighbours]
+            ).values('internship_id').annotate(size=Count('id'), worst=Min('score'))
+        }
+        for neighbour in neighbours:
+            current = lists.get(neighbour.id, {'size': 0, 'worst': None})
+            if current['size'] >= k:
+                if current['worst'] >= neighbour.similarity:
+                    continue
+                SimilarInternship.objects.filter(
+                    pk=SimilarInternship.objects.filter(internship=neighbour).order_by('score').values('pk')[:1]
+                ).delete()
+            SimilarInternship.objects.create(
+                internship=neighbour,
+                similar=internship,
+                score=neighbour.similarity
+            )
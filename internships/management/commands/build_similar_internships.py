@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from internships.knn import K, build_graph
+
+
+class Command(BaseCommand):
+    help = """Recompute the "similar internships" table shown on detail pages.
+
+    Edits are applied to the table as they happen; run this nightly to
+    correct the drift of those local updates, and after switching the
+    embedding model (EMBEDDING_READ_NEXT or a promote).
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k', type=int, default=K, help="Neighbours stored per internship")
+        parser.add_argument('--block-size', type=int, default=256, help="Rows per matrix product")
+
+    def handle(self, *args, **options):
+        count = build_graph(k=options['k'], block_size=options['block_size'])
+        self.stdout.write(self.style.SUCCESS(f"Stored neighbours for {count} internships"))
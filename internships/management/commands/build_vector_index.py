@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from internships.vector_index import build_snapshot, snapshot_version
+
+
+class Command(BaseCommand):
+    help = """Write the snapshot used by VECTOR_INDEX_BACKEND='numpy'.
+
+    Workers switch to the new snapshot within VECTOR_INDEX_REFRESH_SECONDS.
+    Edits made after the build are polled from the database, so a nightly
+    rebuild (and one after every bulk re-embed) keeps the overlay small.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.VECTOR_INDEX_PATH,
+            help="Snapshot directory (defaults to VECTOR_INDEX_PATH)"
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = build_snapshot(options['path'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {count} vectors ({snapshot_version()}) to {options['path']}"
+        ))
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from internships import reembedding
+from internships.utils import CURRENT, NEXT, document_embedding_version, next_model_enabled
+
+
+class Command(BaseCommand):
+    help = """Switch embedding models without downtime.
+
+    1. Set EMBEDDING_NEXT_MODEL_NAME and deploy: every write now also
+       stores the next model's vector (dual-write).
+    2. `embedding_migration backfill` fills embedding_next for old rows.
+    3. Once `embedding_migration status` shows 100%, set
+       EMBEDDING_READ_NEXT=true and deploy: searches use the new vectors.
+    4. `embedding_migration promote` copies embedding_next into embedding.
+    5. Deploy with EMBEDDING_MODEL_NAME set to the new model, the next
+       model unset and EMBEDDING_READ_NEXT=false, then run
+       `embedding_migration backfill --slot current` to catch rows edited
+       between steps 4 and 5, and `embedding_migration clear-next`.
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['status', 'backfill', 'promote', 'clear-next'])
+        parser.add_argument('--model', choices=['internship', 'cv', 'all'], default='all')
+        parser.add_argument('--slot', choices=[CURRENT, NEXT], default=NEXT)
+        parser.add_argument('--batch-size', type=int, default=128)
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+
+    def handle(self, *args, **options):
+        names = list(reembedding.EMBEDDED_MODELS) if options['model'] == 'all' else [options['model']]
+        action = options['action']
+        slot = options['slot']
+
+        if (action in ('backfill', 'promote') and slot == NEXT) and not next_model_enabled():
+            raise CommandError("EMBEDDING_NEXT_MODEL_NAME is not set")
+
+        for name in names:
+            model = reembedding.get_embedded_model(name)
+
+            if action == 'status':
+                self.report(name, model)
+
+            elif action == 'backfill':
+                self.stdout.write(f"Backfilling {name} ({document_embedding_version(slot)})")
+                updated = reembedding.backfill(
+                    model,
+                    slot=slot,
+                    batch_size=options['batch_size'],
+                    pause=options['pause'],
+                    progress=lambda n: self.stdout.write(f"  {n} rows", ending='\r')
+                )
+                self.stdout.write(self.style.SUCCESS(f"  {name}: {updated} rows embedded"))
+
+            elif action == 'promote':
+                if not settings.EMBEDDING_READ_NEXT:
+                    raise CommandError("Flip reads first: set EMBEDDING_READ_NEXT=true and deploy")
+                updated = reembedding.promote(model)
+                self.stdout.write(self.style.SUCCESS(f"{name}: {updated} rows promoted"))
+
+            elif action == 'clear-next':
+                if settings.EMBEDDING_READ_NEXT:
+                    raise CommandError("Reads still use embedding_next")
+                updated = reembedding.clear_next(model)
+                self.stdout.write(self.style.SUCCESS(f"{name}: {updated} shadow vectors cleared"))
+
+    def report(self, name, model):
+        slots = [CURRENT, NEXT] if next_model_enabled() else [CURRENT]
+        for slot in slots:
+            done, total = reembedding.coverage(model, slot)
+            percent = 100.0 * done / total if total else 100.0
+            style = self.style.SUCCESS if done == total else self.style.WARNING
+            self.stdout.write(style(
+                f"{name:<10} {slot:<8} {document_embedding_version(slot)}: "
+                f"{done}/{total} ({percent:.1f}%)"
+            ))
@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from internships.batching import EmbeddingBatcher
+from internships.sidecar import EmbeddingServer
+from internships.utils import embedding_version, encode_local, preload_embedding_model
+
+
+class Command(BaseCommand):
+    help = "Load the embedding model once and serve batched encode requests over a Unix socket"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            default=settings.EMBEDDING_SIDECAR_SOCKET,
+            help="Path of the Unix domain socket (defaults to EMBEDDING_SIDECAR_SOCKET)"
+        )
+        parser.add_argument('--batch-size', type=int, default=settings.EMBEDDING_BATCH_SIZE)
+        parser.add_argument('--wait-ms', type=float, default=settings.EMBEDDING_BATCH_WAIT_MS)
+
+    def handle(self, *args, **options):
+        path = options['socket']
+        if not path:
+            raise CommandError("Pass --socket or set EMBEDDING_SIDECAR_SOCKET")
+
+        preload_embedding_model()
+        # Requests from all workers share one batching queue
+        batcher = EmbeddingBatcher(
+            encode_local,
+            max_batch_size=options['batch_size'],
+            max_wait_ms=options['wait_ms']
+        )
+        server = EmbeddingServer(path, batcher, embedding_version())
+        self.stdout.write(self.style.SUCCESS(
+            f"Serving {embedding_version()} on {path}"
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,152 @@
+import json
+import multiprocessing
+import os
+import queue
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from internships import reembedding
+from internships.utils import CURRENT, NEXT, document_embedding_version, next_model_enabled
+
+
+def run_range(task, progress_queue):
+    """Worker entry point: embed one primary key range and report every batch."""
+    model_name, slot, index, low, high, after, options = task
+    connections.close_all()  # never share the parent's connection after fork
+    if options['workers'] > 1:
+        # Split the cores between the workers instead of oversubscribing them
+        try:
+            import torch
+            torch.set_num_threads(max(1, (os.cpu_count() or 1) // options['workers']))
+        except ImportError:
+            pass
+    model = reembedding.get_embedded_model(model_name)
+    reembedding.reembed_range(
+        model,
+        slot,
+        low=low,
+        high=high,
+        after=after,
+        batch_size=options['batch_size'],
+        stale_only=not options['all'],
+        use_store=not options['skip_store'],
+        on_batch=lambda last_pk, count: progress_queue.put((model_name, index, last_pk, count))
+    )
+    progress_queue.put((model_name, index, None, 0))  # range finished
+
+
+class Command(BaseCommand):
+    help = "Re-embed internships and CVs in large batches, resumably and optionally in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=['internship', 'cv', 'all'], default='all')
+        parser.add_argument('--slot', choices=[CURRENT, NEXT], default=CURRENT)
+        parser.add_argument('--batch-size', type=int, default=512)
+        parser.add_argument('--workers', type=int, default=1, help="Processes, each with its own model copy")
+        parser.add_argument('--all', action='store_true', help="Re-embed rows already at the current version")
+        parser.add_argument('--skip-store', action='store_true', help="Don't read or fill the embedding store")
+        parser.add_argument(
+            '--checkpoint',
+            default='.reembed-checkpoint.json',
+            help="Progress file; an interrupted run resumes from it"
+        )
+
+    def handle(self, *args, **options):
+        slot = options['slot']
+        if slot == NEXT and not next_model_enabled():
+            raise CommandError("EMBEDDING_NEXT_MODEL_NAME is not set")
+
+        names = list(reembedding.EMBEDDED_MODELS) if options['model'] == 'all' else [options['model']]
+        self.checkpoint_path = options['checkpoint']
+        self.checkpoint = self.load_checkpoint()
+
+        for name in names:
+            self.reembed(name, slot, options)
+
+        os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS("Done"))
+
+    def reembed(self, name, slot, options):
+        key = f"{name}:{slot}"
+        version = document_embedding_version(slot)
+        state = self.checkpoint.get(key)
+        if not state or state['version'] != version or state['workers'] != options['workers']:
+            ranges = reembedding.pk_ranges(reembedding.get_embedded_model(name), options['workers'])
+            # [low, high, last written pk or None, done]
+            state = {
+                'version': version,
+                'workers': options['workers'],
+                'ranges': [[low, high, None, False] for low, high in ranges],
+            }
+            self.checkpoint[key] = state
+            self.save_checkpoint()
+        else:
+            self.stdout.write(f"Resuming {key} from {self.checkpoint_path}")
+
+        tasks = [
+            (name, slot, index, low, high, after, options)
+            for index, (low, high, after, done) in enumerate(state['ranges'])
+            if not done
+        ]
+        self.stdout.write(f"Embedding {name} with {version} ({len(tasks)} ranges)")
+
+        written = 0
+        if options['workers'] > 1:
+            context = multiprocessing.get_context('fork')
+            progress_queue = context.Queue()
+            connections.close_all()
+            processes = [context.Process(target=run_range, args=(task, progress_queue)) for task in tasks]
+            for process in processes:
+                process.start()
+            remaining = len(processes)
+            while remaining:
+                try:
+                    model_name, index, last_pk, count = progress_queue.get(timeout=1)
+                except queue.Empty:
+                    if any(process.exitcode for process in processes):
+                        for process in processes:
+                            process.terminate()
+                        raise CommandError(f"A worker failed; rerun to resume from {self.checkpoint_path}")
+                    continue
+                remaining -= last_pk is None
+                written += self.record(state, index, last_pk, count)
+            for process in processes:
+                process.join()
+        else:
+            progress_queue = _InlineQueue(lambda item: self.record(state, *item[1:]))
+            for task in tasks:
+                run_range(task, progress_queue)
+            written = progress_queue.written
+
+        self.stdout.write(self.style.SUCCESS(f"  {name}: {written} rows embedded"))
+
+    def record(self, state, index, last_pk, count):
+        if last_pk is None:
+            state['ranges'][index][3] = True
+        else:
+            state['ranges'][index][2] = last_pk
+            self.stdout.write(f"  range {index}: up to pk {last_pk}", ending='\r')
+        self.save_checkpoint()
+        return count
+
+    def load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        with open(self.checkpoint_path) as f:
+            return json.load(f)
+
+    def save_checkpoint(self):
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self.checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+
+class _InlineQueue:
+    """Stands in for the progress queue when running in this process."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self.written = 0
+
+    def put(self, item):
+        self.written += self.handler(item)
@@ -0,0 +1,42 @@
+import logging
+from django.conf import settings
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+
+class ServerTimingMiddleware:
+    """
+    Report the stage timings of a request (see internships.timing) in a
+    structured log record and, with SERVER_TIMING_HEADER on, a
+    Server-Timing header. Requests that recorded no stage are left alone.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer, token = timing.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            timing.finish(token)
+
+        if timer.stages:
+            total = timer.total()
+            if settings.SERVER_TIMING_HEADER:
+                response['Server-Timing'] = timer.header(total)
+            stages = {name: round(ms, 2) for name, ms in timer.stages.items()}
+            logger.info(
+                "%s %s %s %s total=%.2f",
+                request.method, request.path, response.status_code,
+                ' '.join(f"{name}={ms}" for name, ms in stages.items()), total,
+                extra={
+                    'method': request.method,
+                    'path': request.path,
+                    'status': response.status_code,
+                    'stages_ms': stages,
+                    'total_ms': round(total, 2),
+                }
+            )
+        return response
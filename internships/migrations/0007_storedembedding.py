@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-17 10:12
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('internships', '0006_interview_evaluation_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredEmbedding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('model_version', models.CharField(max_length=200)),
+                ('embedding', pgvector.django.vector.VectorField(dimensions=384)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
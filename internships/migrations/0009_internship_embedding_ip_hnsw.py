@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-17 12:30
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+from pgvector.django import VectorExtension
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; building the
+    # indexes concurrently keeps the table writable meanwhile
+    atomic = False
+
+    dependencies = [
+        ('internships', '0008_internship_embedding_versioning'),
+    ]
+
+    operations = [
+        VectorExtension(),
+        # Stored vectors become unit length, so inner product ranks like cosine
+        # (l2_normalize() needs pgvector >= 0.7)
+        migrations.RunSQL(
+            """
+            UPDATE internships_internship SET embedding = l2_normalize(embedding)
+            WHERE embedding IS NOT NULL;
+            UPDATE internships_internship SET embedding_next = l2_normalize(embedding_next)
+            WHERE embedding_next IS NOT NULL;
+            UPDATE internships_storedembedding SET embedding = l2_normalize(embedding);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='internship_embedding_ip_hnsw', opclasses=['vector_ip_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_next'], m=16, name='internship_emb_next_ip_hnsw', opclasses=['vector_ip_ops']),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-17 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('internships', '0009_internship_embedding_ip_hnsw'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilarInternship',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('internship', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbours', to='internships.internship')),
+                ('similar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='internships.internship')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['internship', '-score'], name='similar_internship_score_idx')],
+                'unique_together': {('internship', 'similar')},
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 14:40
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Adding a stored generated column rewrites the whole table under an
+    # ACCESS EXCLUSIVE lock: reads and writes of internships wait for it,
+    # so run this in a quiet window on large tables
+
+    dependencies = [
+        ('internships', '0010_similarinternship'),
+        ('profiles', '0008_studentcv_normalize_embeddings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='internship',
+            name='search_vector',
+            field=models.GeneratedField(db_persist=True, expression=django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('title', config='simple', weight='A'), '||', django.contrib.postgres.search.SearchVector('requirements', config='simple', weight='B'), django.contrib.postgres.search.SearchConfig('simple')), '||', django.contrib.postgres.search.SearchVector('description', config='simple', weight='C'), django.contrib.postgres.search.SearchConfig('simple')), output_field=django.contrib.postgres.search.SearchVectorField()),
+        ),
+        # The GIN index is built concurrently in 0016_internship_search_vector_gin
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2 on 2026-10-17 16:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('internships', '0012_internship_trigram_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-created_at'], name='internship_pub_recent_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['application_deadline'], name='internship_pub_deadline_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['company', '-created_at'], name='internship_pub_company_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['duration_months'], name='internship_pub_duration_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(condition=models.Q(('status', 'published'), ('remote_option', True)), fields=['-created_at'], name='internship_pub_remote_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-17 16:40
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The partial indexes are built before the full ones are dropped, so
+    # vector searches are served by an index throughout
+    atomic = False
+
+    dependencies = [
+        ('internships', '0013_internship_published_partial_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='internship',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('status', 'published')), ef_construction=64, fields=['embedding'], m=16, name='internship_embedding_pub_hnsw', opclasses=['vector_ip_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='internship',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('status', 'published')), ef_construction=64, fields=['embedding_next'], m=16, name='internship_emb_next_pub_hnsw', opclasses=['vector_ip_ops']),
+        ),
+        RemoveIndexConcurrently(
+            model_name='internship',
+            name='internship_embedding_ip_hnsw',
+        ),
+        RemoveIndexConcurrently(
+            model_name='internship',
+            name='internship_emb_next_ip_hnsw',
+        ),
+    ]
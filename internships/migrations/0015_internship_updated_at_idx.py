@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-17 18:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('internships', '0014_internship_published_hnsw'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='internship',
+            index=models.Index(fields=['updated_at'], name='internship_updated_at_idx'),
+        ),
+    ]
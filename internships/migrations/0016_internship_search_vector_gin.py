@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-17 19:10
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('internships', '0015_internship_updated_at_idx'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='internship',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='internship_search_vector_gin'),
+        ),
+    ]
@@ -1,12 +1,17 @@
 from django.db import models
-from django.db import migrations
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector, SearchVectorField
 from django.forms import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
-from pgvector.django import VectorField
+from django.db.models.functions import Upper
+from pgvector.django import HnswIndex, VectorField
 from users.models import User
 from profiles.models import CompanyProfile
 from .validations import validate_future_date, validate_salary
 
+# Condition of the partial indexes over the live catalogue
+PUBLISHED_ONLY = models.Q(status='published')
+
 class Internship(models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
@@ -28,6 +33,22 @@ class Internship(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     application_deadline = models.DateField(validators=[validate_future_date])
     embedding = VectorField(dimensions=384, null=True, blank=True)  # For storing embeddings
+    embedding_version = models.CharField(max_length=200, blank=True, default='')
+    # Shadow vector from the model being migrated to (EMBEDDING_NEXT_MODEL_NAME)
+    embedding_next = VectorField(dimensions=384, null=True, blank=True)
+    embedding_next_version = models.CharField(max_length=200, blank=True, default='')
+
+    # Keyword search document, kept up to date by Postgres. The 'simple'
+    # configuration does no stemming, as postings are in many languages.
+    search_vector = models.GeneratedField(
+        expression=(
+            SearchVector('title', weight='A', config='simple')
+            + SearchVector('requirements', weight='B', config='simple')
+            + SearchVector('description', weight='C', config='simple')
+        ),
+        output_field=SearchVectorField(),
+        db_persist=True
+    )
 
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
@@ -45,6 +66,47 @@ class Internship(models.Model):
                 name="valid_longitude"
             ),
         ]
+        indexes = [
+            GinIndex(fields=['search_vector'], name='internship_search_vector_gin'),
+            # Trigram indexes on UPPER(), the expression Django compiles
+            # icontains/iexact to: substring and fuzzy location/title matches
+            GinIndex(OpClass(Upper('location'), name='gin_trgm_ops'), name='internship_location_trgm'),
+            GinIndex(OpClass(Upper('title'), name='gin_trgm_ops'), name='internship_title_trgm'),
+            # Listing filters and sorts (internships.filters) only ever read
+            # published rows; drafts and closed postings stay out of these
+            models.Index(fields=['-created_at'], condition=PUBLISHED_ONLY, name='internship_pub_recent_idx'),
+            models.Index(fields=['application_deadline'], condition=PUBLISHED_ONLY, name='internship_pub_deadline_idx'),
+            models.Index(fields=['company', '-created_at'], condition=PUBLISHED_ONLY, name='internship_pub_company_idx'),
+            models.Index(fields=['duration_months'], condition=PUBLISHED_ONLY, name='internship_pub_duration_idx'),
+            models.Index(
+                fields=['-created_at'],
+                condition=PUBLISHED_ONLY & models.Q(remote_option=True),
+                name='internship_pub_remote_idx'
+            ),
+            # NumpyVectorIndex.refresh() polls every few seconds, in every
+            # worker, for rows changed since its snapshot, whatever their status
+            models.Index(fields=['updated_at'], name='internship_updated_at_idx'),
+            # Vectors are unit length, so inner product ranks like cosine;
+            # queries must order by MaxInnerProduct and filter on
+            # PUBLISHED_ONLY (see internships.search). Only the live set is
+            # indexed: a posting leaves the graph when it is closed.
+            HnswIndex(
+                name='internship_embedding_pub_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops'],
+                condition=PUBLISHED_ONLY
+            ),
+            HnswIndex(
+                name='internship_emb_next_pub_hnsw',
+                fields=['embedding_next'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops'],
+                condition=PUBLISHED_ONLY
+            ),
+        ]
 
     @property
     def coordinates(self):
@@ -53,9 +115,8 @@ class Internship(models.Model):
         return None
 
     def update_embedding(self):
-        from .utils import generate_embedding  # Local import to avoid circular imports
-        self.embedding = generate_embedding(self.get_search_text())
-        self.save()
+        from .embedding_store import assign_embeddings  # Local import to avoid circular imports
+        self.save(update_fields=assign_embeddings(self, self.get_search_text()))
 
     def clean(self):
         validate_salary({
@@ -70,6 +131,32 @@ class Internship(models.Model):
     def __str__(self):
         return f"{self.title} at {self.company.company_name}"
 
+class StoredEmbedding(models.Model):
+    """Embedding of a normalized text, keyed by content hash and model version"""
+    key = models.CharField(max_length=64, unique=True)  # sha256 hex
+    model_version = models.CharField(max_length=200)
+    embedding = VectorField(dimensions=384)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.key[:12]} ({self.model_version})"
+
+class SimilarInternship(models.Model):
+    """Precomputed nearest published neighbour of an internship (see internships.knn)"""
+    internship = models.ForeignKey(Internship, on_delete=models.CASCADE, related_name='neighbours')
+    similar = models.ForeignKey(Internship, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()  # cosine similarity
+
+    class Meta:
+        unique_together = ('internship', 'similar')
+        indexes = [
+            models.Index(fields=['internship', '-score'], name='similar_internship_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.internship_id} ~ {self.similar_id} ({self.score:.3f})"
+
 class Application(models.Model):
     STATUS_CHOICES = [
         ('submitted', 'Submitted'),
@@ -218,21 +305,6 @@ class Interview(models.Model):
     def __str__(self):
         return f"{self.get_interview_type_display()} - {self.application.student.email}"
 
-class Migration(migrations.Migration):
-    operations = [
-        migrations.RunSQL('CREATE EXTENSION IF NOT EXISTS vector;'),
-        migrations.RunSQL('''
-            CREATE INDEX ON internships_internship 
-            USING hnsw (embedding vector_l2_ops) 
-            WITH (m = 16, ef_construction = 64);
-        '''),
-        migrations.RunSQL('''
-            ALTER SYSTEM SET pgvector.hnsw.ef_search = 40;
-            SELECT pg_reload_conf();
-        ''')
-    ]
-
-
 class Evaluation(models.Model):
     interview = models.OneToOneField(
         Interview,
@@ -1,3 +1,5 @@
+from django.core import signing
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator, EmptyPage
 
 class CustomPagination:
@@ -80,6 +82,25 @@ class CustomPagination:
             'data': {}  # This empty dict allows your view to add filters
         }
 
+
+CURSOR_SALT = 'internships.pagination.cursor'
+
+
+def encode_cursor(position):
+    """Opaque, URL-safe token for a dict of JSON values, signed with SECRET_KEY"""
+    return signing.dumps(position, salt=CURSOR_SALT)
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor(); raises ValidationError for a token it did not produce"""
+    try:
+        position = signing.loads(cursor, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        raise ValidationError('Invalid cursor')
+    if not isinstance(position, dict):
+        raise ValidationError('Invalid cursor')
+    return position
+
 """
 class CustomPagination(PageNumberPagination):
     page_size = 20
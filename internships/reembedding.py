@@ -0,0 +1,160 @@
+"""
+Bulk (re-)embedding of internships and CVs.
+
+Rows are streamed in primary key order (keyset pagination, no OFFSET),
+only the columns that make up the search text are loaded, every batch is
+encoded with one model call and written back with a single
+UPDATE ... FROM (VALUES ...) statement. Nothing goes through save(), so
+no post_save signal fires per row; internship writes retire cached search
+results themselves. Used by `manage.py reembed` and
+`manage.py embedding_migration backfill`.
+"""
+import time
+from django.apps import apps
+from django.db import connection
+from django.db.models import Max, Min
+from .embedding_store import embed_documents
+from .result_cache import bump_catalogue_version
+from .search import vector_literal
+from .utils import CURRENT, NEXT, document_embedding_version, embedding_field, generate_document_embeddings
+
+EMBEDDED_MODELS = {
+    'internship': 'internships.Internship',
+    'cv': 'profiles.StudentCV',
+}
+
+# Columns get_search_text() reads, per model
+SEARCH_TEXT_FIELDS = {
+    'internship': ['title', 'description', 'requirements'],
+    'cv': ['title', 'skills', 'education', 'experience'],
+}
+
+
+def get_embedded_model(name):
+    return apps.get_model(EMBEDDED_MODELS[name])
+
+
+def model_key(model):
+    return next(name for name, label in EMBEDDED_MODELS.items() if label == model._meta.label)
+
+
+def version_field(slot):
+    return f"{embedding_field(slot)}_version"
+
+
+def coverage(model, slot=CURRENT):
+    """(rows embedded with the slot's current version, total rows)"""
+    total = model.objects.count()
+    done = model.objects.filter(**{version_field(slot): document_embedding_version(slot)}).count()
+    return done, total
+
+
+def pk_ranges(model, parts):
+    """Split the primary key space into `parts` contiguous [low, high] ranges."""
+    bounds = model.objects.aggregate(low=Min('pk'), high=Max('pk'))
+    if bounds['low'] is None:
+        return []
+    low, high = bounds['low'], bounds['high']
+    step = max(1, (high - low + parts) // parts)
+    return [
+        [start, min(start + step - 1, high)]
+        for start in range(low, high + 1, step)
+    ]
+
+
+def write_vectors(model, slot, pks, vectors, version):
+    """Write one batch of vectors and their version tag in a single UPDATE."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    pk_column = connection.ops.quote_name(model._meta.pk.column)
+    field = connection.ops.quote_name(embedding_field(slot))
+    tag_field = connection.ops.quote_name(version_field(slot))
+
+    values = ', '.join(['(%s, %s::vector)'] * len(pks))
+    params = [version]
+    for pk, vector in zip(pks, vectors):
+        params += [pk, vector_literal(vector)]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} AS t SET {field} = v.embedding, {tag_field} = %s "
+            f"FROM (VALUES {values}) AS v(id, embedding) "
+            f"WHERE t.{pk_column} = v.id",
+            params
+        )
+    if model_key(model) == 'internship':
+        bump_catalogue_version()
+
+
+def reembed_range(model, slot=CURRENT, low=None, high=None, after=None, batch_size=512,
+                  stale_only=True, use_store=True, pause=0.0, on_batch=None):
+    """
+    (Re-)embed the rows with low <= pk <= high, resuming after pk `after`.
+
+    With `stale_only` only rows whose version tag differs from the slot's
+    current version are touched. `on_batch(last_pk, count)` is called after
+    every batch is written, for progress reporting and checkpointing.
+    Returns the number of rows written.
+    """
+    version = document_embedding_version(slot)
+    fields = [model._meta.pk.name] + SEARCH_TEXT_FIELDS[model_key(model)]
+    queryset = model.objects.only(*fields).order_by('pk')
+    if stale_only:
+        queryset = queryset.exclude(**{version_field(slot): version})
+    if low is not None:
+        queryset = queryset.filter(pk__gte=low)
+    if high is not None:
+        queryset = queryset.filter(pk__lte=high)
+
+    written = 0
+    while True:
+        batch = queryset if after is None else queryset.filter(pk__gt=after)
+        rows = list(batch[:batch_size])
+        if not rows:
+            return written
+
+        texts = [row.get_search_text() for row in rows]
+        if use_store:
+            vectors = embed_documents(texts, slot)
+        else:
+            vectors = generate_document_embeddings(texts, slot)
+        write_vectors(model, slot, [row.pk for row in rows], vectors, version)
+
+        after = rows[-1].pk
+        written += len(rows)
+        if on_batch:
+            on_batch(after, len(rows))
+        if pause:
+            time.sleep(pause)
+
+
+def backfill(model, slot=NEXT, batch_size=128, pause=0.0, progress=None):
+    """Embed every row whose vector for `slot` is missing or from another version."""
+    total = [0]
+
+    def on_batch(last_pk, count):
+        total[0] += count
+        if progress:
+            progress(total[0])
+
+    return reembed_range(model, slot, batch_size=batch_size, pause=pause, on_batch=on_batch)
+
+
+def promote(model):
+    """Copy the NEXT vectors over the live ones, for rows that have them."""
+    from django.db.models import F
+    promoted = model.objects.filter(
+        embedding_next_version=document_embedding_version(NEXT)
+    ).update(
+        embedding=F('embedding_next'),
+        embedding_version=F('embedding_next_version')
+    )
+    if model_key(model) == 'internship':
+        bump_catalogue_version()
+    return promoted
+
+
+def clear_next(model):
+    return model.objects.exclude(embedding_next=None).update(
+        embedding_next=None,
+        embedding_next_version=''
+    )
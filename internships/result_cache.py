@@ -0,0 +1,106 @@
+"""
+Cache of search responses, invalidated by a catalogue version.
+
+Entries are keyed by endpoint, normalized parameters and the current
+catalogue version, a counter that internship and company profile writes
+bump (see internships.signals). A bump makes every older entry unreachable at
+once; they are never scanned or purged, just evicted by the cache's own
+size limit or timeout. Lookups are counted per endpoint, in process.
+
+The entries and the counter live in the SEARCH_CACHE_ALIAS cache. A
+local-memory cache is per process, so other workers only see a bump once
+their entries time out; that is why caching is off by default unless a
+shared backend (SEARCH_CACHE_URL) is configured.
+"""
+import hashlib
+import json
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from .timing import stage
+
+VERSION_KEY = 'catalogue_version'
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.SEARCH_CACHE_ALIAS]
+
+
+def catalogue_version():
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Start from the clock, not 1, so a counter lost to eviction or a
+        # restart never comes back to a version that older entries used
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalogue_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:  # not set yet
+        catalogue_version()
+
+
+def _record(endpoint, hit):
+    with _stats_lock:
+        counts = _stats.setdefault(endpoint, {'hits': 0, 'misses': 0})
+        counts['hits' if hit else 'misses'] += 1
+
+
+def lookup(endpoint, params):
+    """
+    (key, cached value or None) for `params` at the current catalogue version.
+
+    Pass the key to store(): a value computed after a lookup is filed
+    under the version it was looked up at, so a write committed meanwhile
+    can't leave it visible under the new version.
+    """
+    if not settings.SEARCH_CACHE_ENABLED:
+        return None, None
+    with stage('cache'):
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        key = f"search:{endpoint}:{catalogue_version()}:{digest}"
+        value = get_cache().get(key)
+    _record(endpoint, value is not None)
+    return key, value
+
+
+def store(key, value):
+    if key is not None:
+        with stage('cache'):
+            get_cache().set(key, value)
+
+
+def cached(endpoint, params, compute):
+    """compute(), served from the cache for identical `params` while the catalogue is unchanged."""
+    key, value = lookup(endpoint, params)
+    if value is None:
+        value = compute()
+        store(key, value)
+    return value
+
+
+def stats():
+    with _stats_lock:
+        endpoints = {}
+        for endpoint, counts in _stats.items():
+            lookups = counts['hits'] + counts['misses']
+            endpoints[endpoint] = dict(counts, hit_rate=counts['hits'] / lookups if lookups else None)
+    return {
+        'enabled': settings.SEARCH_CACHE_ENABLED,
+        'catalogue_version': get_cache().get(VERSION_KEY),
+        'endpoints': endpoints,
+    }
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
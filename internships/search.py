@@ -0,0 +1,171 @@
+"""
+Nearest-neighbour ordering that the vector indexes can serve.
+
+Stored and query vectors are unit length, so inner product ranks exactly
+like cosine similarity. The HNSW indexes are built with vector_ip_ops,
+which only serves `ORDER BY embedding <#> query LIMIT n`: the ordering
+must be the bare MaxInnerProduct expression, ascending, with no other
+sort key. Scores for display are derived from it in the SELECT list.
+
+The internship indexes are partial, over published rows only. The
+planner uses them only when the WHERE clause implies their predicate, so
+internship searches must filter on models.PUBLISHED_ONLY itself (the
+status value is sent as a literal); closed postings then never cost
+index memory or post-filtering.
+
+ann_search() runs such a query with per-endpoint index settings (see
+ANN_PROFILES), applied by hnsw_settings() so they never outlive the query.
+
+Iterative scans use relaxed_order, which can return a farther neighbour
+before a closer one found in a later batch; re-sorting the page cannot
+bring back a closer row that didn't make it. That is fine for one page,
+but not for keyset paging, where the cursor would then skip that row on
+every later page: paged searches use strict_order.
+"""
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from pgvector.django import MaxInnerProduct
+from .timing import fetch
+from .utils import embedding_field
+
+# Latency/recall trade-offs, picked per endpoint:
+#   ef_search        HNSW candidate list size; recall and cost grow with it
+#   max_scan_tuples  how far an iterative scan may walk the graph to find
+#                    rows that pass the WHERE clause (pgvector >= 0.8)
+#   retry_ef_search  ef_search of the one retry when filters left the
+#                    page short and iterative scans are off; after that
+#                    the page is completed exactly
+ANN_PROFILES = {
+    # Small "similar items" widgets: a few rows, unfiltered but for status
+    'fast': {'ef_search': 40, 'max_scan_tuples': 5000, 'retry_ef_search': 100},
+    # Interactive search boxes
+    'balanced': {'ef_search': 80, 'max_scan_tuples': 20000, 'retry_ef_search': 400},
+    # Searches with selective user filters, and recommendations
+    'filtered': {'ef_search': 100, 'max_scan_tuples': 50000, 'retry_ef_search': 1000},
+}
+
+
+def nearest(queryset, vector, field=None):
+    """
+    Order `queryset` by similarity to `vector`, most similar first.
+
+    Annotates `distance` (cosine distance, 0 for identical directions)
+    and `similarity` (cosine similarity, 1 - distance). `field` may span
+    a relation, e.g. 'cv__embedding'; it defaults to the read slot's field.
+    """
+    field = field or embedding_field()
+    return queryset.alias(
+        ip_distance=MaxInnerProduct(field, vector)  # -(a . b)
+    ).annotate(
+        distance=1 + F('ip_distance'),
+        similarity=-F('ip_distance')
+    ).order_by('ip_distance')
+
+
+def set_local(using, **options):
+    """
+    SET LOCAL the given hnsw.* options (None resets one to its default) for
+    the current transaction, in one round trip. Returns the previous values.
+    """
+    params = []
+    for name, value in options.items():
+        params += [f'hnsw.{name}', f'hnsw.{name}', None if value is None else str(value)]
+    with connections[using].cursor() as cursor:
+        # Target list entries are evaluated left to right: each old value is
+        # read before it is replaced
+        cursor.execute(
+            "SELECT " + ", ".join(["current_setting(%s, true), set_config(%s, %s, true)"] * len(options)),
+            params
+        )
+        row = cursor.fetchone()
+    return dict(zip(options, row[::2]))
+
+
+@contextmanager
+def hnsw_settings(using, **options):
+    """
+    Apply hnsw.* options to the queries run in the block.
+
+    The block runs in transaction.atomic(), so SET LOCAL ends with it. In a
+    caller's transaction (ATOMIC_REQUESTS, tests, batches) that is only a
+    savepoint, and releasing it keeps the settings: the previous values
+    are put back on the way out. (Rolling back to the savepoint on an
+    error undoes them by itself.)
+    """
+    nested = connections[using].in_atomic_block
+    with transaction.atomic(using=using):
+        previous = set_local(using, **options)
+        yield
+        if nested:
+            set_local(using, **previous)
+
+
+def profile_options(profile, limit, ef_search=None, strict=False):
+    """
+    The hnsw.* settings of an ANN profile for a query returning `limit`
+    rows. `strict` scans return rows in exact distance order.
+    """
+    options = ANN_PROFILES[profile]
+    ef_search = max(ef_search or options['ef_search'], limit)
+    if not settings.PGVECTOR_ITERATIVE_SCAN:
+        # Without iterative scans the candidate list comes out fully sorted
+        return {'ef_search': ef_search}
+    return {
+        'ef_search': ef_search,
+        'iterative_scan': 'strict_order' if strict else 'relaxed_order',
+        'max_scan_tuples': options['max_scan_tuples'],
+    }
+
+
+def vector_literal(vector):
+    """Text form of a vector, for raw SQL parameters cast with ::vector."""
+    return '[' + ','.join(map(repr, map(float, vector))) + ']'
+
+
+def ann_search(queryset, vector, limit, profile='balanced', field=None, after=None, paged=False):
+    """
+    The `limit` rows of `queryset` nearest to `vector`, as a list.
+
+    The index only looks at ef_search candidates, so a selective WHERE
+    clause can leave fewer than `limit` rows. With iterative scans on,
+    the index keeps walking the graph up to max_scan_tuples, so a larger
+    ef_search would find nothing more: a short page goes straight to an
+    exact (sequential) search of the matching rows. Without them, a
+    short page is first retried once with a larger ef_search.
+
+    Rows come in (distance, pk) order. `after`, the (distance, pk) of the
+    last row of the previous page, continues from there (keyset paging).
+    Each page is a new index scan from the graph's entry point; a WHERE
+    predicate on (distance, pk) drops the rows of earlier pages, which are
+    walked again but not fetched. Pass `paged` for every page of a paged
+    search, the first included, so pages are cut in exact distance order.
+    """
+    options = ANN_PROFILES[profile]
+    field = field or embedding_field()
+    using = queryset.db
+
+    def search(queryset):
+        queryset = nearest(queryset, vector, field)
+        if after is not None:
+            distance, pk = after
+            queryset = queryset.filter(Q(distance__gt=distance) | Q(distance=distance, pk__gt=pk))
+        return queryset
+
+    passes = [options['ef_search']]
+    if not settings.PGVECTOR_ITERATIVE_SCAN:
+        passes.append(options['retry_ef_search'])
+    for ef_search in passes:
+        scan = profile_options(profile, limit, ef_search, strict=paged or after is not None)
+        with fetch(using), hnsw_settings(using, **scan):
+            results = list(search(queryset)[:limit])
+        if len(results) >= limit:
+            # relaxed_order may return neighbours slightly out of order
+            return sorted(results, key=lambda row: (row.distance, row.pk))
+
+    # Ordering by the derived distance bypasses the index: exact, and only
+    # reached when the filters match few rows
+    exact = search(queryset.exclude(**{f'{field}__isnull': True}))
+    with fetch(using):
+        return list(exact.order_by('distance', 'pk')[:limit])
@@ -0,0 +1,180 @@
+"""
+Embedding sidecar: one process per node holds the model and serves encode
+requests from all web workers over a Unix domain socket.
+
+Wire format, both directions: a 4-byte big-endian length followed by a
+JSON header. Successful encode responses are followed by the vectors as
+raw little-endian float32 bytes of the shape given in the header.
+
+    request:  {"op": "encode", "texts": [...], "version": "..."}
+    response: {"ok": true, "shape": [n, dim]} + n * dim * 4 bytes
+    error:    {"ok": false, "error": "..."}
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+
+class SidecarError(Exception):
+    pass
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise SidecarError("Connection closed by peer")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def send_message(sock, header, payload=b''):
+    data = json.dumps(header).encode('utf-8')
+    sock.sendall(HEADER.pack(len(data)) + data + payload)
+
+
+def recv_header(sock):
+    (size,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if size > MAX_MESSAGE_SIZE:
+        raise SidecarError(f"Message of {size} bytes exceeds the limit")
+    return json.loads(_recv_exact(sock, size))
+
+
+class SidecarClient:
+    """
+    Client used by generate_embedding() when EMBEDDING_SIDECAR_SOCKET is set.
+
+    `encode` returns None instead of raising when the sidecar is unreachable,
+    and skips further attempts for `retry_after` seconds, so callers can fall
+    back to in-process encoding without paying a connect timeout per request.
+    """
+
+    def __init__(self, path, version, timeout=5.0, retry_after=10.0):
+        self.path = path
+        self.version = version
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'failures': 0, 'skipped': 0}
+
+    def _request(self, header):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            send_message(sock, header)
+            response = recv_header(sock)
+            if not response.get('ok'):
+                raise SidecarError(response.get('error', 'Unknown sidecar error'))
+            payload = b''
+            if 'shape' in response:
+                rows, dim = response['shape']
+                payload = _recv_exact(sock, rows * dim * 4)
+            return response, payload
+
+    def _available(self):
+        if time.monotonic() < self._down_until:
+            with self._lock:
+                self._stats['skipped'] += 1
+            return False
+        return True
+
+    def _mark_down(self, error):
+        logger.warning("Embedding sidecar at %s unavailable: %s", self.path, error)
+        with self._lock:
+            self._stats['failures'] += 1
+        self._down_until = time.monotonic() + self.retry_after
+
+    def encode(self, texts):
+        if not self._available():
+            return None
+        with self._lock:
+            self._stats['requests'] += 1
+        try:
+            response, payload = self._request({
+                'op': 'encode',
+                'texts': list(texts),
+                'version': self.version,
+            })
+        except (OSError, ValueError, SidecarError) as e:
+            self._mark_down(e)
+            return None
+        return np.frombuffer(payload, dtype='<f4').reshape(response['shape'])
+
+    def ping(self):
+        if not self._available():
+            return False
+        try:
+            self._request({'op': 'ping', 'version': self.version})
+            return True
+        except (OSError, ValueError, SidecarError) as e:
+            self._mark_down(e)
+            return False
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['available'] = time.monotonic() >= self._down_until
+        return stats
+
+
+class EmbeddingRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request = recv_header(self.request)
+            except (SidecarError, OSError, ValueError):
+                return  # client went away
+
+            if request.get('version') != server.version:
+                send_message(self.request, {
+                    'ok': False,
+                    'error': f"Sidecar serves {server.version}, not {request.get('version')}"
+                })
+                continue
+
+            if request.get('op') == 'ping':
+                send_message(self.request, {'ok': True})
+                continue
+
+            try:
+                texts = request['texts']
+                vectors = np.asarray(server.batcher.submit_many(texts), dtype='<f4')
+                vectors = vectors.reshape(len(texts), -1)
+            except Exception as e:
+                logger.exception("Embedding request failed")
+                send_message(self.request, {'ok': False, 'error': str(e)})
+                continue
+
+            send_message(self.request, {'ok': True, 'shape': list(vectors.shape)}, vectors.tobytes())
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, batcher, version):
+        self.batcher = batcher
+        self.version = version
+        if os.path.exists(path):
+            os.unlink(path)  # stale socket from a previous run
+        super().__init__(path, EmbeddingRequestHandler)
+        os.chmod(path, 0o660)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
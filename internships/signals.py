@@ -1,36 +1,61 @@
 from .models import Internship, Interview, Evaluation
+from .embedding_store import EMBEDDING_FIELDS
+from .result_cache import bump_catalogue_version
 from notifications.utils import create_notification
-from django.db.models.signals import post_save
+from profiles.models import CompanyProfile
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.db import transaction
 
+SEARCH_TEXT_FIELDS = ['title', 'description', 'requirements']
+
+
+@receiver(pre_save, sender=Internship)
+def remember_stored_internship(sender, instance, update_fields=None, **kwargs):
+    """
+    Stash the stored status and text fields before the row is overwritten,
+    so post_save can tell what changed.
+    """
+    instance._stored = None
+    if instance.pk and not (update_fields and set(update_fields) <= EMBEDDING_FIELDS):
+        instance._stored = Internship.objects.filter(pk=instance.pk).values(
+            'status', *SEARCH_TEXT_FIELDS
+        ).first()
+
 
 @receiver(post_save, sender=Internship)
-def update_internship_embedding(sender, instance, created, **kwargs):
+def update_internship_embedding(sender, instance, created, update_fields=None, **kwargs):
     """
-    Update vector embedding when internship is created or text fields change.
+    Update vector embedding when internship is created or text fields change,
+    and the similar-internships graph when its vector or status changes.
     Uses transaction.on_commit to ensure it runs after successful save.
     """
-    # Check if we need to update the embedding
-    fields_to_check = ['title', 'description', 'requirements']
-    update_needed = False
+    from .knn import update_neighbours
 
-    if created:
-        update_needed = True
-    else:
-        # Get the original instance before update
-        try:
-            original = Internship.objects.get(pk=instance.pk)
-            for field in fields_to_check:
-                if getattr(original, field) != getattr(instance, field):
-                    update_needed = True
-                    break
-        except Internship.DoesNotExist:
-            pass
+    if update_fields and set(update_fields) <= EMBEDDING_FIELDS:
+        # update_embedding() stored a new vector
+        transaction.on_commit(lambda: update_neighbours(instance))
+        return
 
-    if update_needed:
+    stored = getattr(instance, '_stored', None)
+    if created or stored is None or any(
+        stored[field] != getattr(instance, field) for field in SEARCH_TEXT_FIELDS
+    ):
         # Use transaction.on_commit to avoid race conditions
         transaction.on_commit(lambda: instance.update_embedding())
+    elif stored['status'] != instance.status:
+        transaction.on_commit(lambda: update_neighbours(instance))
+
+@receiver(post_save, sender=Internship)
+@receiver(post_delete, sender=Internship)
+@receiver(post_save, sender=CompanyProfile)
+def invalidate_search_results(sender, instance, **kwargs):
+    """
+    Any internship write, vectors and status included, retires cached search
+    results; so do company profile saves, as results show the company's
+    name and logo. (Deleting a company deletes its internships.)
+    """
+    transaction.on_commit(bump_catalogue_version)
 
 @receiver(post_save, sender=Interview)
 def handle_interview_scheduling(sender, instance, created, **kwargs):
@@ -1,3 +1,1194 @@
-from django.test import TestCase
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+import numpy as np
+from datetime import date, timedelta
+from django.utils import timezone
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Q
+from django.http import JsonResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from .batching import EmbeddingBatcher
+from .diversity import diversify_options, mmr
+from .filters import parse_filters
+from .caches import LRUCache
+from .chunking import chunk_text, pool
+from .sidecar import EmbeddingServer, SidecarClient
+from .backends import PARITY_TOLERANCE, load_backend
+from . import embedding_store, hybrid, knn, pagination, reembedding, result_cache, timing
+from .middleware import ServerTimingMiddleware
+from .models import Internship, SimilarInternship, StoredEmbedding
+from .search import ANN_PROFILES, ann_search
+from .vector_index import NumpyVectorIndex, PgVectorIndex, _Snapshot, build_snapshot, STATUS_CODES
+from .utils import NEXT, document_embedding_version, get_query_cache, preload_embedding_model
+from django.urls import reverse
+from users.models import Session, User
+from profiles.models import CompanyProfile, StudentCV, StudentProfile
+from recommendations.utils import get_student_recommendations
 
-# Create your tests here.
+
+def fake_vectors(texts, slot=None):
+    return np.array([np.full(384, len(t), dtype=np.float32) for t in texts])
+
+
+def unit_vectors(texts, slot=None):
+    rng = np.random.default_rng(len(texts))
+    vectors = rng.normal(size=(len(texts), 384)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def create_company(email='company@test.com', name="Test Corp"):
+    user = User.objects.create(email=email, role='company', first_name='Test', last_name='Company')
+    return CompanyProfile.objects.create(user=user, company_name=name)
+
+
+def auth_headers(user):
+    return {'HTTP_AUTHORIZATION': f'Bearer {Session.create_session(user).token}'}
+
+
+def student_headers(email='student@test.com'):
+    # ProfileCompletionMiddleware turns students without a profile away
+    student = User.objects.create(email=email, role='student')
+    StudentProfile.objects.create(user=student)
+    return auth_headers(student)
+
+
+def create_internship(company, **fields):
+    values = {
+        'title': "Backend intern",
+        'description': "Build APIs with Django",
+        'requirements': "Python, SQL",
+        'duration_months': 6,
+        'location': "Paris",
+        'status': 'published',
+        'application_deadline': date.today() + timedelta(days=30),
+    }
+    values.update(fields)
+    return Internship.objects.create(company=company, **values)
+
+
+class EmbeddingBatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def fake_encode(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[float(len(t)), 1.0] for t in texts], dtype=np.float32)
+
+    def test_single_submit_returns_own_vector(self):
+        batcher = EmbeddingBatcher(self.fake_encode, max_batch_size=8, max_wait_ms=1)
+        vector = batcher.submit("abc")
+        self.assertEqual(vector.tolist(), [3.0, 1.0])
+        self.assertEqual(batcher.stats()['batches'], 1)
+
+    def test_concurrent_submits_are_batched(self):
+        """Concurrent callers share one encode call and each get their own row"""
+        batcher = EmbeddingBatcher(self.fake_encode, max_batch_size=4, max_wait_ms=200)
+        results = {}
+        texts = ['a', 'bb', 'ccc', 'dddd']
+
+        def worker(text):
+            results[text] = batcher.submit(text)
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in texts]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        for text in texts:
+            self.assertEqual(results[text][0], float(len(text)))
+        self.assertLess(len(self.calls), len(texts))
+        stats = batcher.stats()
+        self.assertEqual(stats['items'], 4)
+        self.assertGreater(stats['mean_batch_size'], 1)
+
+    def test_encode_errors_propagate_to_callers(self):
+        def failing_encode(texts):
+            raise RuntimeError("model unavailable")
+
+        batcher = EmbeddingBatcher(failing_encode, max_batch_size=2, max_wait_ms=1)
+        with self.assertRaises(RuntimeError):
+            batcher.submit("text")
+        self.assertEqual(batcher.stats()['errors'], 1)
+
+    @mock.patch('internships.utils._batchers', {})
+    def test_concurrent_first_callers_share_one_batcher(self):
+        from .utils import get_batcher
+
+        def slow_batcher(*args, **kwargs):
+            time.sleep(0.01)  # widen the race window
+            return mock.Mock()
+
+        with mock.patch('internships.batching.EmbeddingBatcher', side_effect=slow_batcher) as create:
+            threads = [threading.Thread(target=get_batcher) for _ in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        self.assertEqual(create.call_count, 1)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    def test_expired_entries_are_misses(self):
+        cache = LRUCache(10, ttl=60)
+        cache.set('python', 1)
+        with mock.patch('internships.caches.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('python'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_stats_report_hit_rate(self):
+        cache = LRUCache(10)
+        cache.set('python', 1)
+        cache.get('python')
+        cache.get('marketing intern')
+
+        stats = cache.stats()
+        self.assertEqual(stats['hit_rate'], 0.5)
+        self.assertEqual(stats['size'], 1)
+
+
+def whitespace_tokenizer(text, **kwargs):
+    return {'offset_mapping': [m.span() for m in re.finditer(r'\S+', text)]}
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        position = {'s': "abc", 'd': 0.25, 'i': 7, 'n': 10}
+
+        self.assertEqual(pagination.decode_cursor(pagination.encode_cursor(position)), position)
+
+    def test_rejects_tampered_and_foreign_tokens(self):
+        cursor = pagination.encode_cursor({'s': "abc", 'd': 0.25, 'i': 7, 'n': 10})
+        payload, signature = cursor.rsplit(':', 1)
+        forged = [
+            f"{payload}:{signature[::-1]}",
+            signing.dumps({'s': "abc", 'd': 0.25, 'i': 7, 'n': 0}),  # wrong salt
+            pagination.encode_cursor([1, 2]),
+            "not-a-cursor",
+        ]
+        for token in forged:
+            with self.assertRaisesMessage(ValidationError, 'Invalid cursor'):
+                pagination.decode_cursor(token)
+
+
+class ChunkingTests(SimpleTestCase):
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(chunk_text("python intern", whitespace_tokenizer, 8), [("python intern", 2)])
+
+    def test_long_text_is_split_into_overlapping_windows(self):
+        text = ' '.join(f"w{i}" for i in range(10))
+        chunks = chunk_text(text, whitespace_tokenizer, 4, overlap=1)
+
+        self.assertEqual([c for c, _ in chunks], ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"])
+        self.assertEqual([n for _, n in chunks], [4, 4, 4])
+
+    def test_pool_is_token_weighted_mean_of_unit_vectors(self):
+        pooled = pool([[2.0, 0.0], [0.0, 5.0]], [3, 1])
+        np.testing.assert_allclose(pooled, [0.75, 0.25])
+
+
+class EmbeddingSidecarTests(SimpleTestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), 'embedding.sock')
+        batcher = EmbeddingBatcher(fake_vectors, max_batch_size=8, max_wait_ms=1)
+        self.server = EmbeddingServer(self.path, batcher, 'test-model@torch')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_round_trip(self):
+        client = SidecarClient(self.path, 'test-model@torch')
+        vectors = client.encode(["ab", "abcd"])
+
+        self.assertEqual(vectors.shape, (2, 384))
+        self.assertEqual(vectors[1][0], 4.0)
+        self.assertTrue(client.ping())
+
+    def test_version_mismatch_is_refused(self):
+        client = SidecarClient(self.path, 'other-model@onnx')
+        self.assertIsNone(client.encode(["text"]))
+
+    def test_unreachable_sidecar_backs_off(self):
+        client = SidecarClient(self.path + '.missing', 'test-model@torch')
+        self.assertIsNone(client.encode(["text"]))
+        self.assertIsNone(client.encode(["text"]))
+        self.assertEqual(client.stats()['skipped'], 1)
+
+
+class EmbeddingBackendParityTests(SimpleTestCase):
+    """Every backend must agree with float32 PyTorch within PARITY_TOLERANCE"""
+    sentences = [
+        "Python backend developer internship",
+        "Stage en marketing digital à Paris",
+        "Data analyst intern, remote, SQL and dashboards",
+        "Prácticas de diseño gráfico en Madrid",
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reference = load_backend('torch', settings.EMBEDDING_MODEL_NAME).encode(cls.sentences)
+
+    def assert_parity(self, backend_name):
+        backend = load_backend(backend_name, settings.EMBEDDING_MODEL_NAME)
+        vectors = backend.encode(self.sentences)
+
+        self.assertEqual(vectors.dtype, np.float32)
+        self.assertEqual(vectors.shape, (len(self.sentences), 384))
+        cosine = np.sum(vectors * self.reference, axis=1) / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(self.reference, axis=1)
+        )
+        self.assertGreaterEqual(cosine.min(), PARITY_TOLERANCE[backend_name])
+
+    def test_torch_backend(self):
+        self.assert_parity('torch')
+
+    def test_quantized_backend(self):
+        self.assert_parity('torch-int8')
+
+    @unittest.skipUnless(importlib.util.find_spec('onnxruntime'), "onnxruntime is not installed")
+    def test_onnx_backend(self):
+        self.assert_parity('onnx')
+
+
+class LazyImportTests(SimpleTestCase):
+    def test_startup_does_not_import_the_ml_stack(self):
+        # Fresh interpreter: this test process may already have torch loaded
+        script = (
+            "import sys, django; django.setup(); import InternRealm.urls; "
+            "print(','.join(m for m in ('torch', 'sentence_transformers', 'transformers') if m in sys.modules))"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE='InternRealm.settings', EMBEDDING_PRELOAD='false')
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        self.assertEqual(result.stdout.strip(), '')
+
+
+class PreloadTests(SimpleTestCase):
+    @mock.patch('internships.utils._model_ready', False)
+    @mock.patch('internships.utils.gc.freeze')
+    @mock.patch('internships.utils.encode_local')
+    def test_only_the_pre_fork_preload_freezes(self, encode_local, freeze):
+        # The readiness probe's background preload runs in a serving worker
+        preload_embedding_model()
+        freeze.assert_not_called()
+
+        with mock.patch('internships.utils._model_ready', False):
+            preload_embedding_model(freeze=True)
+        freeze.assert_called_once()
+
+
+class EmbeddingStoreTests(TestCase):
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=fake_vectors)
+    def test_identical_texts_are_encoded_once(self, generate):
+        vectors = embedding_store.embed_documents(["Backend intern", "Backend  intern", "Designer"])
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(generate.call_args[0][0], ["Backend intern", "Designer"])
+        np.testing.assert_array_equal(vectors[0], vectors[1])
+        self.assertEqual(StoredEmbedding.objects.count(), 2)
+
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=fake_vectors)
+    def test_stored_vectors_skip_the_model(self, generate):
+        embedding_store.embed_document("Data analyst")
+        before = embedding_store.store_stats()
+        vector = embedding_store.embed_document("Data analyst")
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(vector.shape, (384,))
+        self.assertEqual(embedding_store.store_stats()['hits'], before['hits'] + 1)
+
+    def test_key_depends_on_model_version(self):
+        self.assertNotEqual(
+            embedding_store.content_key("text", "model-a@torch"),
+            embedding_store.content_key("text", "model-a@torch-int8")
+        )
+
+
+@override_settings(EMBEDDING_NEXT_MODEL_NAME='sentence-transformers/all-MiniLM-L6-v2')
+@mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=fake_vectors)
+class EmbeddingMigrationTests(TestCase):
+    def setUp(self):
+        self.company = create_company()
+
+    def test_update_embedding_dual_writes(self, generate):
+        internship = create_internship(self.company)
+        internship.update_embedding()
+        internship.refresh_from_db()
+
+        self.assertEqual(internship.embedding_version, document_embedding_version())
+        self.assertEqual(internship.embedding_next_version, document_embedding_version(NEXT))
+        self.assertIsNotNone(internship.embedding_next)
+
+    def test_backfill_covers_every_row(self, generate):
+        for i in range(5):
+            create_internship(self.company, title=f"Intern {i}")
+
+        self.assertEqual(reembedding.coverage(Internship, NEXT), (0, 5))
+        updated = reembedding.backfill(Internship, NEXT, batch_size=2)
+
+        self.assertEqual(updated, 5)
+        self.assertEqual(reembedding.coverage(Internship, NEXT), (5, 5))
+        self.assertEqual(reembedding.backfill(Internship, NEXT), 0)
+
+
+@mock.patch('internships.reembedding.embed_documents', side_effect=fake_vectors)
+class ReembedTests(TestCase):
+    def setUp(self):
+        company = create_company()
+        self.internships = [create_internship(company, title=f"Intern {i}") for i in range(6)]
+
+    def test_pk_ranges_cover_the_table(self, embed):
+        ranges = reembedding.pk_ranges(Internship, 4)
+        pks = [i.pk for i in self.internships]
+
+        self.assertEqual(ranges[0][0], min(pks))
+        self.assertEqual(ranges[-1][1], max(pks))
+        for (_, high), (low, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(low, high + 1)
+
+    def test_resumes_after_checkpoint_and_skips_current_rows(self, embed):
+        checkpoints = []
+        written = reembedding.reembed_range(
+            Internship,
+            after=self.internships[1].pk,
+            batch_size=2,
+            on_batch=lambda last_pk, count: checkpoints.append(last_pk)
+        )
+
+        self.assertEqual(written, 4)
+        self.assertEqual(checkpoints, [self.internships[3].pk, self.internships[5].pk])
+        self.assertEqual(Internship.objects.filter(embedding_version=document_embedding_version()).count(), 4)
+        # Already at the current version: nothing left to do
+        self.assertEqual(reembedding.reembed_range(Internship, after=self.internships[1].pk), 0)
+
+
+class VectorIndexPlanTests(TestCase):
+    """Nearest-neighbour queries must be served by the HNSW inner-product index"""
+    index = 'internship_embedding_pub_hnsw'
+
+    def setUp(self):
+        company = create_company()
+        for i, vector in enumerate(unit_vectors(range(10))):
+            create_internship(company, title=f"Intern {i}", embedding=vector)
+        self.query = unit_vectors(["query"])[0]
+        # The planner would rightly prefer a sequential scan over ten rows
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+
+    def assert_uses_index(self, search, *indexes):
+        """Run search() and EXPLAIN the vector query it sent"""
+        with CaptureQueriesContext(connection) as queries:
+            search()
+        sql = next(query['sql'] for query in queries if '<#>' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        for index in (self.index, *indexes):
+            self.assertIn(index, plan)
+
+    def test_semantic_search(self):
+        self.assert_uses_index(
+            lambda: ann_search(Internship.objects.filter(status='published'), self.query, 5)
+        )
+
+    def test_vector_index_backend(self):
+        self.assert_uses_index(lambda: PgVectorIndex().search(self.query, 5))
+
+    def test_vector_index_backend_fetches_companies(self):
+        results = PgVectorIndex().search(self.query, 5)
+        with self.assertNumQueries(0):
+            self.assertEqual({i.company.company_name for i in results}, {"Test Corp"})
+
+    def test_filtered_search(self):
+        queryset = Internship.objects.filter(status='published', location__icontains='paris')
+        self.assert_uses_index(lambda: ann_search(queryset, self.query, 5, profile='filtered'))
+
+    def test_hybrid_search(self):
+        # The RRF statement: HNSW for the vector list, GIN for the keyword list
+        self.assert_uses_index(
+            lambda: hybrid.hybrid_search("backend intern", self.query, 5),
+            'internship_search_vector_gin'
+        )
+        self.assert_uses_index(
+            lambda: hybrid.hybrid_search("backend intern", self.query, 5, location="Paris"),
+            'internship_search_vector_gin'
+        )
+
+    def test_batch_search(self):
+        # Each LATERAL top-k of the batched statement
+        self.assert_uses_index(lambda: PgVectorIndex().search_many([self.query, -self.query], 3))
+
+    def test_similar_internships(self):
+        internship = Internship.objects.first()
+        queryset = Internship.objects.filter(status='published').exclude(id=internship.id)
+        self.assert_uses_index(lambda: ann_search(queryset, internship.embedding, 3, profile='fast'))
+
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=unit_vectors)
+    def test_student_recommendations(self, generate):
+        student = User.objects.create(email='student@test.com', role='student', first_name='Test', last_name='Student')
+        StudentCV.objects.create(user=student, title="Backend developer", skills=["Python"], is_default=True)
+
+        self.assert_uses_index(lambda: get_student_recommendations(student, 5))
+        scores = [i.match_score for i in get_student_recommendations(student, 5)]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+
+class AnnSearchTests(TestCase):
+    def setUp(self):
+        company = create_company()
+        vectors = unit_vectors(range(12))
+        for i, vector in enumerate(vectors):
+            create_internship(company, title=f"Intern {i}", location="Lyon" if i < 3 else "Paris", embedding=vector)
+        create_internship(company, title="Not embedded yet", location="Lyon")
+        self.query = vectors[0]
+
+    def test_returns_a_full_page_nearest_first(self):
+        results = ann_search(Internship.objects.filter(status='published'), self.query, 10)
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0].title, "Intern 0")
+        self.assertAlmostEqual(results[0].similarity, 1.0, places=5)
+        distances = [row.distance for row in results]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_selective_filter_is_completed_exactly(self):
+        queryset = Internship.objects.filter(status='published', location="Lyon")
+        results = ann_search(queryset, self.query, 10, profile='filtered')
+
+        # Every embedded match, and no row without a vector
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0].title, "Intern 0")
+
+    def test_keyset_pages_beyond_ef_search_have_no_gaps(self):
+        company = create_company(email='other@test.com', name="Other Corp")
+        for i, vector in enumerate(unit_vectors(range(100))):
+            create_internship(company, title=f"More {i}", embedding=vector)
+        queryset = Internship.objects.filter(status='published')
+        expected = set(queryset.exclude(embedding__isnull=True).values_list('id', flat=True))
+        self.assertGreater(len(expected), ANN_PROFILES['balanced']['ef_search'])
+
+        served, distances, after = [], [], None
+        while True:
+            page = ann_search(queryset, self.query, 25, after=after, paged=True)
+            served += [row.id for row in page]
+            distances += [row.distance for row in page]
+            if len(page) < 25:
+                break
+            after = (page[-1].distance, page[-1].id)
+
+        self.assertEqual(len(served), len(set(served)))
+        self.assertEqual(set(served), expected)
+        self.assertEqual(distances, sorted(distances))
+
+    def hnsw_setting(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT current_setting(%s, true)", [f'hnsw.{name}'])
+            return cursor.fetchone()[0]
+
+    def test_profiles_do_not_leak_into_the_outer_transaction(self):
+        queryset = Internship.objects.filter(status='published')
+        before = {name: self.hnsw_setting(name) for name in ('ef_search', 'iterative_scan')}
+        # The test's transaction is the outer one; this block is a savepoint
+        with transaction.atomic():
+            ann_search(queryset, self.query, 5, profile='filtered', paged=True)
+            self.assertEqual({name: self.hnsw_setting(name) for name in before}, before)
+            with CaptureQueriesContext(connection) as queries:
+                ann_search(queryset, self.query, 5, profile='fast')
+            self.assertIn("'40'", next(query['sql'] for query in queries if 'set_config' in query['sql']))
+            self.assertEqual({name: self.hnsw_setting(name) for name in before}, before)
+
+    def vector_queries(self, queryset):
+        with CaptureQueriesContext(connection) as queries:
+            ann_search(queryset, self.query, 10, profile='filtered')
+        return sum('<#>' in query['sql'] for query in queries)
+
+    def test_short_page_skips_the_retry_with_iterative_scans(self):
+        queryset = Internship.objects.filter(status='published', location="Lyon")
+        # One index scan, then the exact completion
+        self.assertEqual(self.vector_queries(queryset), 2)
+        with override_settings(PGVECTOR_ITERATIVE_SCAN=False):
+            self.assertEqual(self.vector_queries(queryset), 3)
+
+
+
+class NumpyTopKTests(SimpleTestCase):
+    def setUp(self):
+        self.vectors = unit_vectors(range(6))
+        self.snapshot = _Snapshot(
+            'test',
+            self.vectors,
+            np.arange(1, 7, dtype=np.int64),
+            np.array([STATUS_CODES['published']] * 5 + [STATUS_CODES['draft']], dtype=np.int8),
+            np.array([1, 1, 1, 2, 2, 2], dtype=np.int64),
+            None
+        )
+
+    def test_matches_brute_force_order(self):
+        query = self.vectors[0]
+        ids, scores = self.snapshot.top_k(query, 3, set(), None)
+
+        expected = np.argsort(-(self.vectors[:5] @ query))[:3] + 1
+        self.assertEqual(ids, expected.tolist())
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_after_resumes_behind_the_last_result(self):
+        query = self.vectors[0]
+        ids, scores = self.snapshot.top_k(query, 5, set(), None)
+        after = (1 - scores[1], ids[1])
+
+        self.assertEqual(self.snapshot.top_k(query, 5, set(), None, after)[0], ids[2:])
+
+    def test_filters_status_company_and_excluded_ids(self):
+        ids, _ = self.snapshot.top_k(self.vectors[3], 10, {4}, 2)
+        self.assertEqual(ids, [5])  # 6 is a draft
+
+    def test_changed_rows_supersede_the_snapshot(self):
+        now = timezone.now()
+        changed = self.snapshot.with_changes([
+            (1, 'closed', 1, self.vectors[0], now),
+            (7, 'published', 1, self.vectors[0], now),
+        ])
+        ids, _ = changed.top_k(self.vectors[0], 1, set(), None)
+
+        self.assertEqual(ids, [7])
+        self.assertEqual(changed.watermark, now)
+        # Only live postings are held in memory
+        self.assertEqual(list(changed.overlay), [7])
+        # The original is untouched: searches in flight keep a consistent view
+        self.assertEqual(self.snapshot.top_k(self.vectors[0], 1, set(), None)[0], [1])
+
+
+class NumpyVectorIndexTests(TestCase):
+    def setUp(self):
+        self.company = create_company()
+        vectors = unit_vectors(range(8))
+        self.internships = [
+            create_internship(self.company, title=f"Intern {i}", embedding=vector)
+            for i, vector in enumerate(vectors)
+        ]
+        self.path = tempfile.mkdtemp()
+        build_snapshot(self.path)
+        self.index = NumpyVectorIndex(self.path)
+
+    def test_agrees_with_pgvector(self):
+        query = unit_vectors(["query"])[0]
+        expected = [i.id for i in PgVectorIndex().search(query, 5)]
+        self.assertEqual([i.id for i in self.index.search(query, 5)], expected)
+
+    def test_picks_up_changes_after_the_build(self):
+        first = self.internships[0]
+        first.status = 'closed'
+        first.save()
+        added = create_internship(self.company, title="New", embedding=first.embedding)
+        self.index.refresh(force=True)
+
+        results = self.index.search(first.embedding, 3)
+
+        self.assertEqual(results[0].id, added.id)
+        self.assertNotIn(first.id, [i.id for i in results])
+
+
+class KnnBlocksTests(SimpleTestCase):
+    def test_blocks_match_the_full_similarity_matrix(self):
+        vectors = unit_vectors(range(30))
+        full = vectors @ vectors.T
+        np.fill_diagonal(full, -np.inf)
+
+        for row, neighbours, scores in knn.top_k_blocks(vectors, 5, block_size=7):
+            self.assertEqual(neighbours.tolist(), np.argsort(-full[row])[:5].tolist())
+            np.testing.assert_allclose(scores, full[row][neighbours], atol=1e-5)
+
+
+class SimilarInternshipTests(TestCase):
+    def setUp(self):
+        self.company = create_company()
+        self.vectors = unit_vectors(range(6))
+        self.internships = [
+            create_internship(self.company, title=f"Intern {i}", embedding=vector)
+            for i, vector in enumerate(self.vectors)
+        ]
+        knn.build_graph(k=3)
+
+    def neighbour_ids(self, internship):
+        return list(internship.neighbours.order_by('-score').values_list('similar_id', flat=True))
+
+    def test_build_stores_k_best_first(self):
+        first = self.internships[0]
+        scores = self.vectors[1:] @ self.vectors[0]
+        expected = [self.internships[i + 1].id for i in np.argsort(-scores)[:3]]
+
+        self.assertEqual(self.neighbour_ids(first), expected)
+        self.assertEqual(SimilarInternship.objects.count(), 6 * 3)
+
+    def test_closed_internship_leaves_every_list(self):
+        closed = self.internships[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            closed.status = 'closed'
+            closed.save()
+
+        self.assertFalse(SimilarInternship.objects.filter(Q(internship=closed) | Q(similar=closed)).exists())
+
+    def test_new_internship_joins_its_neighbours_lists(self):
+        twin = create_internship(self.company, title="Twin", embedding=self.vectors[0])
+        knn.update_neighbours(twin, k=3)
+
+        self.assertEqual(self.neighbour_ids(twin)[0], self.internships[0].id)
+        self.assertEqual(self.neighbour_ids(self.internships[0])[0], twin.id)
+        self.assertEqual(self.internships[0].neighbours.count(), 3)
+
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=unit_vectors)
+    def test_editing_the_text_re_embeds(self, generate):
+        internship = self.internships[2]
+        with self.captureOnCommitCallbacks(execute=True):
+            internship.title = "Machine learning intern"
+            internship.save()
+
+        self.assertEqual(generate.call_count, 1)
+        internship.refresh_from_db()
+        self.assertEqual(internship.embedding_version, document_embedding_version())
+
+
+class KeywordSearchTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        company = create_company()
+        self.in_title = create_internship(company, title="Django developer", description="APIs", requirements="Python")
+        self.in_requirements = create_internship(company, title="Backend intern", description="APIs", requirements="Django, SQL")
+        self.in_description = create_internship(company, title="Web intern", description="Some Django work", requirements="HTML")
+        create_internship(company, title="Designer", description="Posters", requirements="Figma")
+        self.headers = student_headers()
+
+    def search(self, **params):
+        response = self.client.get(reverse('list-internships'), params, **self.headers)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_matches_are_ranked_by_field_weight(self):
+        self.assertEqual(
+            self.search(search="django"),
+            [self.in_title.id, self.in_requirements.id, self.in_description.id]
+        )
+
+    def test_websearch_syntax(self):
+        self.assertEqual(self.search(search="django -sql", sort_by="title"), [self.in_title.id, self.in_description.id])
+
+    def test_plan_uses_the_gin_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        query = SearchQuery("django", search_type='websearch', config='simple')
+        plan = Internship.objects.filter(search_vector=query).explain()
+        self.assertIn('internship_search_vector_gin', plan)
+
+
+class LocationFilterTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        company = create_company()
+        self.paris = create_internship(company, location="Paris")
+        self.parisot = create_internship(company, location="Parisot")
+        self.lyon = create_internship(company, location="Lyon")
+        self.headers = student_headers()
+
+    def search(self, **params):
+        response = self.client.get(reverse('list-internships'), params, **self.headers)
+        return [result['id'] for result in response.json()['results']]
+
+    def test_fuzzy_location_ranks_the_closest_spelling_first(self):
+        self.assertEqual(self.search(location="~pariss"), [self.paris.id, self.parisot.id])
+
+    def test_substring_and_exact_location(self):
+        self.assertEqual(sorted(self.search(location="aris")), [self.paris.id, self.parisot.id])
+        self.assertEqual(self.search(location='"paris"'), [self.paris.id])
+
+    def test_plan_uses_the_trigram_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        plan = Internship.objects.filter(location__icontains="aris").explain()
+        self.assertIn('internship_location_trgm', plan)
+
+
+class HybridSearchTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        company = create_company()
+        self.vectors = unit_vectors(range(4))
+        close = self.vectors[0] * 0.9 + self.vectors[2] * 0.1
+        self.both = create_internship(company, title="Django developer", embedding=self.vectors[0])
+        self.keyword_only = create_internship(company, title="Django tester", embedding=self.vectors[1])
+        self.semantic_only = create_internship(
+            company, title="Web intern", description="Build web pages", requirements="HTML",
+            embedding=close / np.linalg.norm(close)
+        )
+        create_internship(company, title="Designer", description="Posters", requirements="Figma", embedding=self.vectors[3])
+        self.headers = student_headers()
+
+    def test_match_on_both_signals_ranks_first(self):
+        results = hybrid.hybrid_search("django developer", self.vectors[0], limit=10)
+        ids = [result.id for result in results]
+
+        self.assertEqual(ids[0], self.both.id)
+        self.assertIn(self.keyword_only.id, ids)
+        self.assertIn(self.semantic_only.id, ids)
+        scores = [result.score for result in results]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_keyword_only_match_is_returned(self):
+        results = hybrid.hybrid_search("tester", self.vectors[3], limit=10, candidates=1)
+        by_id = {result.id: result for result in results}
+
+        self.assertIn(self.keyword_only.id, by_id)
+        self.assertEqual(by_id[self.keyword_only.id].keyword_rank, 1)
+        self.assertIsNone(by_id[self.keyword_only.id].semantic_rank)
+
+    @mock.patch('internships.utils.embed_query')
+    def test_debug_reports_each_signal(self, embed_query):
+        embed_query.return_value = self.vectors[0]
+        response = self.client.post(
+            reverse('hybrid-search'),
+            {'query': "django", 'debug': True},
+            content_type='application/json',
+            **self.headers
+        )
+
+        first = response.json()['results'][0]
+        self.assertEqual(first['id'], self.both.id)
+        self.assertEqual(first['signals']['keyword']['rank'], 1)
+        self.assertEqual(first['signals']['semantic']['rank'], 1)
+
+    def test_non_string_parameters_are_rejected(self):
+        for body in ({'query': "django", 'location': 5}, {'query': "django", 'location': ["x"]}, {'query': 5}):
+            response = self.client.post(
+                reverse('hybrid-search'), body, content_type='application/json', **self.headers
+            )
+            self.assertEqual(response.status_code, 400, body)
+
+
+@override_settings(SEARCH_CACHE_ENABLED=True)
+class ResultCacheTests(SimpleTestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        result_cache.reset_stats()
+
+    def test_entries_are_reused_until_the_catalogue_changes(self):
+        compute = mock.Mock(side_effect=[["first"], ["second"]])
+
+        self.assertEqual(result_cache.cached('search', {'query': "django"}, compute), ["first"])
+        self.assertEqual(result_cache.cached('search', {'query': "django"}, compute), ["first"])
+        result_cache.bump_catalogue_version()
+        self.assertEqual(result_cache.cached('search', {'query': "django"}, compute), ["second"])
+
+        self.assertEqual(compute.call_count, 2)
+        stats = result_cache.stats()['endpoints']['search']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+
+    def test_lost_counter_never_revisits_an_old_version(self):
+        old = result_cache.catalogue_version()
+        result_cache.get_cache().delete(result_cache.VERSION_KEY)
+        result_cache.bump_catalogue_version()
+
+        self.assertGreater(result_cache.catalogue_version(), old)
+
+    @override_settings(SEARCH_CACHE_ENABLED=False)
+    def test_disabled_cache_always_computes(self):
+        compute = mock.Mock(return_value=["result"])
+        result_cache.cached('search', {'query': "django"}, compute)
+        result_cache.cached('search', {'query': "django"}, compute)
+
+        self.assertEqual(compute.call_count, 2)
+
+
+@override_settings(SEARCH_CACHE_ENABLED=True)
+class ListingCacheTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        self.company = create_company()
+        create_internship(self.company, title="Backend intern")
+        self.headers = student_headers()
+
+    def titles(self):
+        response = self.client.get(reverse('list-internships'), {'sort_by': 'title'}, **self.headers)
+        return [result['title'] for result in response.json()['results']]
+
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=unit_vectors)
+    def test_internship_writes_invalidate_cached_listings(self, generate):
+        self.assertEqual(self.titles(), ["Backend intern"])
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.titles(), ["Backend intern"])
+        self.assertFalse(any('internships_internship' in query['sql'] for query in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_internship(self.company, title="Data intern")
+        self.assertEqual(self.titles(), ["Backend intern", "Data intern"])
+
+    def test_company_renames_invalidate_cached_listings(self):
+        response = self.client.get(reverse('list-internships'), **self.headers)
+        self.assertEqual(response.json()['results'][0]['company']['name'], "Test Corp")
+
+        self.company.company_name = "Renamed Corp"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.company.save()
+        response = self.client.get(reverse('list-internships'), **self.headers)
+        self.assertEqual(response.json()['results'][0]['company']['name'], "Renamed Corp")
+
+
+class FilterParsingTests(SimpleTestCase):
+    def test_query_string_and_json_values_compile_alike(self):
+        from_query = parse_filters({'min_duration': '3', 'is_paid': 'true', 'remote_only': 'True'})
+        from_json = parse_filters({'min_duration': 3, 'is_paid': True, 'remote_only': True})
+
+        self.assertEqual(from_query.params, from_json.params)
+        self.assertEqual(from_query.q, from_json.q)
+
+    def test_fuzzy_location(self):
+        filters = parse_filters({'location': "~ Pariss "})
+
+        self.assertEqual(filters.fuzzy_location, "PARISS")
+        self.assertIn('location_similarity', filters.apply(Internship.objects.all()).query.annotations)
+
+    def test_malformed_values_are_rejected(self):
+        for data, message in [
+            ({'min_duration': 'six'}, 'Duration must be a positive integer'),
+            ({'min_salary': 'abc'}, 'Minimum salary must be a valid number'),
+            ({'company_id': '1; drop'}, 'Invalid company ID'),
+        ]:
+            with self.assertRaisesMessage(ValidationError, message):
+                parse_filters(data)
+
+    def test_no_filters(self):
+        self.assertFalse(parse_filters({'query': "django", 'is_paid': 'maybe'}))
+
+
+class SemanticSearchFilterTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        company = create_company()
+        self.vectors = unit_vectors(range(30))
+        for i, vector in enumerate(self.vectors):
+            create_internship(
+                company, title=f"Intern {i}", embedding=vector,
+                location="Lyon" if i % 10 == 0 else "Paris", duration_months=3 if i % 2 else 6
+            )
+        self.headers = student_headers()
+
+    @mock.patch('internships.utils.embed_query')
+    def search(self, embed_query, **filters):
+        embed_query.return_value = self.vectors[1]
+        response = self.client.post(
+            reverse('semantic-search'), {'query': "intern", **filters},
+            content_type='application/json', **self.headers
+        )
+        return response
+
+    def test_filters_apply_before_the_top_k_cut(self):
+        results = self.search(location="lyon", max_duration=6).json()['results']
+
+        # Filtered in the vector query, so all three matches come back
+        self.assertEqual(sorted(result['title'] for result in results), ["Intern 0", "Intern 10", "Intern 20"])
+
+    def test_invalid_filter_is_a_client_error(self):
+        response = self.search(min_duration="six")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Duration must be a positive integer')
+
+
+@override_settings(SEMANTIC_SEARCH_MAX_DEPTH=25)
+class SemanticSearchPaginationTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        company = create_company()
+        self.vectors = unit_vectors(range(40))
+        for i, vector in enumerate(self.vectors):
+            create_internship(company, title=f"Intern {i}", embedding=vector)
+        self.headers = student_headers()
+
+    @mock.patch('internships.utils.embed_query')
+    def search(self, embed_query, **data):
+        embed_query.return_value = self.vectors[0]
+        return self.client.post(
+            reverse('semantic-search'), {'query': "intern", **data},
+            content_type='application/json', **self.headers
+        )
+
+    def test_pages_continue_without_overlap_up_to_the_max_depth(self):
+        pages, cursor = [], None
+        while True:
+            body = self.search(page_size=10, cursor=cursor).json()
+            pages.append(body['results'])
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        results = [result for page in pages for result in page]
+        self.assertEqual(len({result['id'] for result in results}), 25)
+        distances = [result['score'] for result in results]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_cursor_is_bound_to_its_search(self):
+        cursor = self.search(page_size=10).json()['next_cursor']
+
+        response = self.search(page_size=10, cursor=cursor, is_paid='true')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.search(cursor="not-a-cursor").status_code, 400)
+
+    def test_cursor_cannot_be_forged(self):
+        cursor = self.search(page_size=10).json()['next_cursor']
+        position = signing.loads(cursor, salt=pagination.CURSOR_SALT)
+
+        # An edited cursor fails the signature check, even with the right search id
+        unsigned = signing.dumps({**position, 'n': 0})
+        response = self.search(page_size=10, cursor=unsigned)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+        # A correctly signed cursor still can't put the search above the max depth
+        negative = pagination.encode_cursor({**position, 'n': -100})
+        response = self.search(page_size=10, cursor=negative)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'Invalid cursor')
+
+
+class BatchSemanticSearchTests(TestCase):
+    def setUp(self):
+        company = create_company()
+        self.vectors = unit_vectors(range(12))
+        for i, vector in enumerate(self.vectors):
+            create_internship(company, title=f"Intern {i}", embedding=vector)
+        create_internship(company, title="Draft", status='draft', embedding=self.vectors[0])
+        self.query_vectors = {"backend": self.vectors[0], "data": self.vectors[5]}
+        get_query_cache().clear()
+        self.headers = student_headers()
+
+    def encode(self, texts, slot=None):
+        return np.array([self.query_vectors[text] for text in texts])
+
+    def test_one_encode_and_one_vector_query_for_the_batch(self):
+        with mock.patch('internships.utils.generate_embeddings', side_effect=self.encode) as generate, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('batch-semantic-search'), {'queries': ["backend", "data", "backend"], 'limit': 3},
+                content_type='application/json', **self.headers
+            )
+
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(sum('<#>' in query['sql'] for query in queries), 1)
+        results = response.json()['results']
+        self.assertEqual(list(results), ["backend", "data"])
+        for text, vector in self.query_vectors.items():
+            expected = [i.id for i in PgVectorIndex().search(vector, 3)]
+            self.assertEqual([result['id'] for result in results[text]], expected)
+            self.assertEqual(results[text][0]['company']['name'], "Test Corp")
+
+    def test_batch_size_is_bounded(self):
+        response = self.client.post(
+            reverse('batch-semantic-search'), {'queries': ["q"] * 21},
+            content_type='application/json', **self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class MmrTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        # Three near-identical postings, then distinct ones
+        base = unit_vectors(range(5))
+        self.vectors = np.vstack([base[0] + 0.01 * rng.normal(size=(3, 384)), base[1:]]).astype(np.float32)
+        self.vectors /= np.linalg.norm(self.vectors, axis=1, keepdims=True)
+        self.relevance = np.array([0.9, 0.89, 0.88, 0.6, 0.5, 0.4, 0.3], dtype=np.float32)
+
+    def test_lambda_one_keeps_the_relevance_order(self):
+        self.assertEqual(mmr(self.relevance, self.vectors, 4, lambda_=1.0), [0, 1, 2, 3])
+
+    def test_near_duplicates_make_way(self):
+        picked = mmr(self.relevance, self.vectors, 3, lambda_=0.5)
+        self.assertEqual(picked[0], 0)
+        self.assertEqual(len(set(picked) & {0, 1, 2}), 1)
+
+    def test_per_group_cap(self):
+        groups = np.array([1, 1, 1, 1, 2, 2, 3])
+        picked = mmr(self.relevance, self.vectors, 7, lambda_=1.0, groups=groups, max_per_group=2)
+        self.assertEqual(picked, [0, 1, 4, 5, 6])
+
+    def test_options(self):
+        self.assertIsNone(diversify_options({}))
+        self.assertEqual(
+            diversify_options({'diversify': 'true', 'diversity_lambda': '0.5', 'max_per_company': 1}),
+            {'lambda': 0.5, 'max_per_company': 1}
+        )
+        with self.assertRaisesMessage(ValidationError, 'diversity_lambda must be between 0 and 1'):
+            diversify_options({'diversify': True, 'diversity_lambda': 2})
+
+
+class DiversifiedSearchTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        self.vectors = unit_vectors(range(10))
+        crowded = create_company()
+        for i in range(5):
+            create_internship(crowded, title=f"Clone {i}", embedding=self.vectors[0])
+        other = create_company(email='other@test.com', name="Other Corp")
+        for i in range(1, 4):
+            create_internship(other, title=f"Other {i}", embedding=self.vectors[i])
+        self.headers = student_headers()
+
+    @mock.patch('internships.utils.embed_query')
+    def test_company_cap_and_report(self, embed_query):
+        embed_query.return_value = self.vectors[0]
+        body = self.client.post(
+            reverse('semantic-search'),
+            {'query': "clone", 'page_size': 4, 'diversify': True, 'max_per_company': 2},
+            content_type='application/json', **self.headers
+        ).json()
+
+        companies = [result['company']['name'] for result in body['results']]
+        self.assertEqual(companies.count("Test Corp"), 2)
+        self.assertEqual(len(companies), 4)
+        self.assertEqual(body['diversity']['candidates'], 8)
+        self.assertIn('rerank_ms', body['diversity'])
+        self.assertIsNone(body['next_cursor'])
+
+
+class ServerTimingTests(SimpleTestCase):
+    def view(self, request):
+        with timing.stage('embed'):
+            pass
+        with timing.stage('serialize'):
+            pass
+        with timing.stage('embed'):
+            pass
+        return JsonResponse({'success': True})
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_stages_are_reported_and_logged(self):
+        middleware = ServerTimingMiddleware(self.view)
+        with self.assertLogs('internships.middleware', 'INFO') as logs:
+            response = middleware(RequestFactory().post('/api/internships/search/'))
+
+        names = [entry.split(';')[0] for entry in response['Server-Timing'].split(', ')]
+        self.assertEqual(names, ['embed', 'serialize', 'total'])
+        record = logs.records[0]
+        self.assertEqual(record.path, '/api/internships/search/')
+        self.assertEqual(list(record.stages_ms), ['embed', 'serialize'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_can_be_turned_off(self):
+        with self.assertLogs('internships.middleware', 'INFO'):
+            response = ServerTimingMiddleware(self.view)(RequestFactory().get('/'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_requests_without_stages_have_no_header(self):
+        middleware = ServerTimingMiddleware(lambda request: JsonResponse({'success': True}))
+        response = middleware(RequestFactory().get('/'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_stages_outside_a_request_are_ignored(self):
+        with timing.stage('embed'):
+            pass
+        with timing.fetch():
+            pass
+
+
+@override_settings(SEARCH_CACHE_ENABLED=True, SERVER_TIMING_HEADER=True)
+class SearchTimingTests(TestCase):
+    def setUp(self):
+        result_cache.get_cache().clear()
+        get_query_cache().clear()
+        self.vectors = unit_vectors(range(3))
+        company = create_company()
+        for vector in self.vectors:
+            create_internship(company, embedding=vector)
+        self.headers = student_headers()
+
+    @mock.patch('internships.utils.generate_embedding')
+    def test_semantic_search_breakdown(self, generate):
+        generate.return_value = self.vectors[0]
+        response = self.client.post(
+            reverse('semantic-search'), {'query': "backend"},
+            content_type='application/json', **self.headers
+        )
+
+        stages = dict(
+            entry.split(';dur=') for entry in response['Server-Timing'].split(', ')
+        )
+        self.assertTrue({'embed', 'cache', 'db', 'hydrate', 'serialize', 'total'} <= set(stages))
+        self.assertTrue(all(float(ms) >= 0 for ms in stages.values()))
+
+    @contextmanager
+    def serialize_queries(self):
+        """Count the queries run inside each 'serialize' stage in the block"""
+        counts = []
+        real_stage = timing.stage
+
+        @contextmanager
+        def stage(name):
+            with real_stage(name), CaptureQueriesContext(connection) as queries:
+                yield
+            if name == 'serialize':
+                counts.append(len(queries))
+
+        with mock.patch('internships.timing.stage', stage), mock.patch('internships.views.stage', stage):
+            yield counts
+
+    @mock.patch('internships.embedding_store.generate_document_embeddings', side_effect=unit_vectors)
+    @mock.patch('internships.utils.embed_queries', side_effect=lambda texts: unit_vectors(texts))
+    @mock.patch('internships.utils.embed_query', side_effect=lambda text: unit_vectors([text])[0])
+    def test_serialization_runs_no_queries(self, embed_query, embed_queries, generate):
+        # Related rows are fetched with the results: the serialize stage
+        # must not hide database time
+        student = User.objects.create(email='cv@test.com', role='student', last_login=timezone.now())
+        StudentProfile.objects.create(user=student)
+        cv = StudentCV.objects.create(user=student, title="Backend developer", skills=["Python"], is_default=True)
+        StudentCV.objects.filter(pk=cv.pk).update(embedding=list(self.vectors[1]))
+        internship = Internship.objects.first()
+
+        requests = [
+            lambda: self.client.post(reverse('semantic-search'), {'query': "backend"},
+                                     content_type='application/json', **self.headers),
+            lambda: self.client.post(reverse('hybrid-search'), {'query': "backend"},
+                                     content_type='application/json', **self.headers),
+            lambda: self.client.post(reverse('batch-semantic-search'), {'queries': ["backend", "data"]},
+                                     content_type='application/json', **self.headers),
+            # No precomputed neighbours: the live vector search
+            lambda: self.client.get(f'/api/internship/{internship.id}/', **self.headers),
+            lambda: self.client.get(reverse('student-recommendations'), **auth_headers(student)),
+        ]
+        for request in requests:
+            with self.serialize_queries() as counts:
+                response = request()
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertTrue(counts)
+            self.assertEqual(sum(counts), 0, response.request['PATH_INFO'])
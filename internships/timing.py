@@ -0,0 +1,88 @@
+"""
+Per-request stage timings for the vector-backed endpoints.
+
+ServerTimingMiddleware (internships.middleware) starts a StageTimer for
+every request. Code on the request path wraps its phases in stage(),
+e.g. `with stage('embed'):`, and fetches rows inside fetch(), which
+splits the time between the SQL (`db`) and building model instances
+from the rows (`hydrate`). Time spent in the same stage adds up. The
+totals go out in a Server-Timing header and one log record per request.
+
+Outside a request (management commands, tests calling functions
+directly) no timer is active and stage() costs one ContextVar lookup.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db import connections
+
+_timer = ContextVar('stage_timer', default=None)
+
+
+class StageTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # name -> milliseconds, in first-seen order
+
+    def add(self, name, ms):
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+    def total(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self, total=None):
+        entries = [f"{name};dur={ms:.2f}" for name, ms in self.stages.items()]
+        entries.append(f"total;dur={self.total() if total is None else total:.2f}")
+        return ', '.join(entries)
+
+
+def start():
+    """Make a new timer current; returns (timer, token for finish())."""
+    timer = StageTimer()
+    return timer, _timer.set(timer)
+
+
+def finish(token):
+    _timer.reset(token)
+
+
+@contextmanager
+def stage(name):
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, (time.perf_counter() - started) * 1000)
+
+
+@contextmanager
+def fetch(using='default'):
+    """
+    Time a block that queries and builds instances: SQL execution counts
+    as `db`, the rest of the block as `hydrate`.
+    """
+    timer = _timer.get()
+    if timer is None:
+        yield
+        return
+    db_ms = 0.0
+
+    def timed(execute, sql, params, many, context):
+        nonlocal db_ms
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            db_ms += (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    try:
+        with connections[using].execute_wrapper(timed):
+            yield
+    finally:
+        timer.add('db', db_ms)
+        timer.add('hydrate', (time.perf_counter() - started) * 1000 - db_ms)
@@ -21,5 +21,8 @@ urlpatterns = [
          views.update_application_status, 
          name='update-application-status'),
     path('search/', views.semantic_search, name='semantic-search'),
-    path('get_embedding/', views.get_embedding, name='get-embedding')
+    path('search/batch/', views.batch_semantic_search, name='batch-semantic-search'),
+    path('hybrid-search/', views.hybrid_search, name='hybrid-search'),
+    path('get_embedding/', views.get_embedding, name='get-embedding'),
+    path('embedding/stats/', views.embedding_stats, name='embedding-stats'),
 ]
\ No newline at end of file
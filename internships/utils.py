@@ -1,19 +1,236 @@
-from sentence_transformers import SentenceTransformer
+import gc
+import threading
+from django.conf import settings
+from .backends import load_backend
+from .timing import stage
 import numpy as np
 
-model = None
+# Embedding models are addressed by slot: CURRENT is the model the stored
+# vectors come from, NEXT is the model being migrated to (see
+# EMBEDDING_NEXT_MODEL_NAME). Searches read the slot given by read_slot().
+CURRENT = 'current'
+NEXT = 'next'
+
+_models = {}
+_model_ready = False
+_model_lock = threading.Lock()
+_preload_lock = threading.Lock()
+_batchers = {}
+_batchers_lock = threading.Lock()
+_query_cache = None
+_query_cache_lock = threading.Lock()
+_sidecar_client = None
+
+def model_settings(slot=CURRENT):
+    """(model name, backend) configured for a slot."""
+    if slot == NEXT:
+        return (
+            settings.EMBEDDING_NEXT_MODEL_NAME,
+            settings.EMBEDDING_NEXT_BACKEND or settings.EMBEDDING_BACKEND
+        )
+    return settings.EMBEDDING_MODEL_NAME, settings.EMBEDDING_BACKEND
+
+def next_model_enabled():
+    return bool(settings.EMBEDDING_NEXT_MODEL_NAME)
+
+def read_slot():
+    return NEXT if settings.EMBEDDING_READ_NEXT else CURRENT
+
+def embedding_field(slot=None):
+    """Model field holding the vectors of a slot (the read slot by default)."""
+    return 'embedding_next' if (slot or read_slot()) == NEXT else 'embedding'
 
 # To reduce memory usage in production:
-def get_embedding_model():
-    global model
-    if model is None:
-        model = SentenceTransformer(
-            'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2',
-            device='cpu'
+def get_embedding_model(slot=CURRENT):
+    """Load the configured inference backend (see internships.backends)."""
+    if slot not in _models:
+        with _model_lock:
+            if slot not in _models:
+                model_name, backend = model_settings(slot)
+                model = load_backend(
+                    backend,
+                    model_name,
+                    onnx_path=settings.EMBEDDING_ONNX_PATH,
+                    onnx_file=settings.EMBEDDING_ONNX_FILE
+                )
+                # Lightweight mode: shorter sequences encode faster; long documents
+                # are chunked instead of truncated (see EMBEDDING_CHUNKING)
+                model.max_seq_length = settings.EMBEDDING_MAX_SEQ_LENGTH
+                _models[slot] = model
+    return _models[slot]
+
+def preload_embedding_model(freeze=False):
+    """
+    Load the model and run a warmup encode.
+
+    Called from InternshipsConfig.ready() when EMBEDDING_PRELOAD is on, so
+    under `gunicorn --preload` the weights are loaded once in the master and
+    shared copy-on-write by the forked workers. `freeze` is only for that
+    pre-fork call: in a process that already serves requests, gc.freeze()
+    would move live request garbage into the permanent generation for good.
+    """
+    global _model_ready
+    with _preload_lock:
+        if _model_ready:
+            return
+        # Bypass the batcher: its thread must not be started before the fork
+        encode_local(["warmup"])
+        if next_model_enabled():
+            encode_local(["warmup"], NEXT)
+        if freeze:
+            # Move everything allocated so far out of the collector's reach, so
+            # GC passes in the workers don't write to (and copy) the shared pages
+            gc.freeze()
+        _model_ready = True
+
+def is_model_ready():
+    if _model_ready or read_slot() in _models:
+        return True
+    return (
+        bool(settings.EMBEDDING_SIDECAR_SOCKET)
+        and read_slot() == CURRENT
+        and get_sidecar_client().ping()
+    )
+
+def start_background_preload():
+    """Load the model off the request path (used by the readiness probe)."""
+    if _preload_lock.locked() or is_model_ready():
+        return
+    threading.Thread(target=preload_embedding_model, name='embedding-preload', daemon=True).start()
+
+def embedding_version(slot=CURRENT):
+    """Tag identifying the vectors produced by the model and backend of a slot."""
+    model_name, backend = model_settings(slot)
+    return f"{model_name}@{backend}:seq{settings.EMBEDDING_MAX_SEQ_LENGTH}"
+
+def document_embedding_version(slot=CURRENT):
+    """Like embedding_version(), plus the chunking applied to documents."""
+    version = embedding_version(slot)
+    if settings.EMBEDDING_CHUNKING:
+        version += f":chunk{settings.EMBEDDING_CHUNK_OVERLAP}"
+    return version
+
+def encode_local(texts, slot=CURRENT) -> np.ndarray:
+    """Encode a list of texts in a single forward pass, one row per text."""
+    return get_embedding_model(slot).encode(texts, batch_size=settings.EMBEDDING_BATCH_SIZE)
+
+def get_sidecar_client():
+    global _sidecar_client
+    if _sidecar_client is None:
+        from .sidecar import SidecarClient
+        _sidecar_client = SidecarClient(
+            settings.EMBEDDING_SIDECAR_SOCKET,
+            embedding_version(),
+            timeout=settings.EMBEDDING_SIDECAR_TIMEOUT
+        )
+    return _sidecar_client
+
+def encode_texts(texts, slot=CURRENT) -> np.ndarray:
+    """Encode through the embedding sidecar if configured, else in-process."""
+    texts = list(texts)
+    # The sidecar serves the current model only
+    if settings.EMBEDDING_SIDECAR_SOCKET and slot == CURRENT:
+        vectors = get_sidecar_client().encode(texts)
+        if vectors is not None:
+            return vectors
+        # Sidecar is down: fall back to loading the model in this process
+    return encode_local(texts, slot)
+
+def get_batcher(slot=CURRENT):
+    if slot not in _batchers:
+        # One batcher per slot: concurrent first callers must not each start one
+        with _batchers_lock:
+            if slot not in _batchers:
+                from .batching import EmbeddingBatcher
+                _batchers[slot] = EmbeddingBatcher(
+                    lambda texts: encode_texts(texts, slot),
+                    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+                    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS
+                )
+    return _batchers[slot]
+
+def generate_embedding(text: str, slot=CURRENT) -> np.array:
+    if settings.EMBEDDING_BATCHING:
+        return get_batcher(slot).submit(text)
+    return encode_texts([text], slot)[0]
+
+def generate_embeddings(texts, slot=CURRENT) -> np.ndarray:
+    """Encode many texts at once; callers that already hold a batch skip the queue."""
+    return encode_texts(texts, slot)
+
+def normalize_query(text):
+    return ' '.join((text or '').split()).casefold()
+
+def get_query_cache():
+    global _query_cache
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                from .caches import LRUCache
+                _query_cache = LRUCache(
+                    settings.QUERY_EMBEDDING_CACHE_SIZE,
+                    ttl=settings.QUERY_EMBEDDING_CACHE_TTL
+                )
+    return _query_cache
+
+def embed_query(text: str) -> np.ndarray:
+    """Embedding of a search query, served from the shared query cache when possible."""
+    slot = read_slot()
+    query = normalize_query(text)
+    key = (embedding_version(slot), query)
+    cache = get_query_cache()
+
+    with stage('embed'):
+        vector = cache.get(key)
+        if vector is None:
+            vector = np.asarray(generate_embedding(query, slot), dtype=np.float32)
+            vector.flags.writeable = False  # shared between requests
+            cache.set(key, vector)
+    return vector
+
+def embed_queries(texts) -> list:
+    """embed_query() for many queries, encoding all cache misses in one model call."""
+    slot = read_slot()
+    version = embedding_version(slot)
+    cache = get_query_cache()
+    queries = [normalize_query(text) for text in texts]
+
+    with stage('embed'):
+        vectors = {query: cache.get((version, query)) for query in set(queries)}
+        missing = [query for query, vector in vectors.items() if vector is None]
+        if missing:
+            for query, vector in zip(missing, generate_embeddings(missing, slot)):
+                vector = np.asarray(vector, dtype=np.float32)
+                vector.flags.writeable = False  # shared between requests
+                cache.set((version, query), vector)
+                vectors[query] = vector
+    return [vectors[query] for query in queries]
+
+def generate_document_embeddings(texts, slot=CURRENT) -> np.ndarray:
+    """Embeddings for stored documents; long texts are chunked and pooled if enabled."""
+    if settings.EMBEDDING_CHUNKING:
+        from .chunking import embed_chunked
+        return embed_chunked(
+            texts,
+            lambda chunks: generate_embeddings(chunks, slot),
+            model_settings(slot)[0]
         )
-        # Lightweight mode
-        # model.max_seq_length = 128  # Reduce from default 256
-    return model
+    return generate_embeddings(texts, slot)
 
-def generate_embedding(text: str) -> np.array:
-    return get_embedding_model().encode(text)
\ No newline at end of file
+def embedding_stats():
+    from .embedding_store import store_stats
+    from .result_cache import stats as result_cache_stats
+    from .vector_index import get_vector_index
+    return {
+        'batching': {slot: batcher.stats() for slot, batcher in _batchers.items()},
+        'store': store_stats(),
+        'query_cache': get_query_cache().stats(),
+        'sidecar': get_sidecar_client().stats() if settings.EMBEDDING_SIDECAR_SOCKET else None,
+        'vector_index': get_vector_index().stats(),
+        'result_cache': result_cache_stats(),
+        'read_slot': read_slot(),
+        'versions': {
+            CURRENT: embedding_version(),
+            NEXT: embedding_version(NEXT) if next_model_enabled() else None,
+        },
+    }
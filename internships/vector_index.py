@@ -0,0 +1,415 @@
+"""
+Nearest-neighbour search over internships, behind one interface.
+
+PgVectorIndex runs the search in Postgres through the HNSW index (see
+internships.search). NumpyVectorIndex does an exact search in process:
+the vectors of every embedded internship are one float32 matrix in a
+snapshot directory written by `manage.py build_vector_index`, loaded
+with mmap so all workers on a host share the same pages, and a query is
+one matrix-vector product plus argpartition. Rows changed since the
+snapshot are polled from the database (by updated_at) into a small
+per-process overlay, so edits show up without rebuilding the snapshot.
+
+Select the backend with VECTOR_INDEX_BACKEND; the NumPy backend falls
+back to pgvector while no usable snapshot exists, and for searches with
+listing filters.
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+import numpy as np
+from .models import PUBLISHED_ONLY, Internship
+from .search import ann_search, hnsw_settings, profile_options, vector_literal
+from .timing import fetch, stage
+from .utils import document_embedding_version, embedding_field, read_slot
+
+logger = logging.getLogger(__name__)
+
+STATUS_CODES = {status: code for code, (status, _) in enumerate(Internship.STATUS_CHOICES)}
+PUBLISHED = STATUS_CODES['published']
+
+# Re-read rows updated up to this long before the last poll, so a
+# transaction that committed late with an older updated_at is not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+# Extra candidates fetched to cover rows deleted or unpublished since the
+# last refresh, which are dropped when the results are loaded
+OVERFETCH = 10
+
+
+class VectorIndex:
+    name = None
+
+    def search(self, vector, k, exclude=(), company_id=None, profile='balanced', filters=None, after=None,
+               paged=False):
+        """
+        The `k` published internships nearest to `vector`, best first.
+
+        Returns Internship instances with `distance` (cosine distance) and
+        `similarity` set, in (distance, id) order. `profile` is the ANN
+        profile used by backends that approximate (see
+        internships.search.ANN_PROFILES). `filters`
+        (internships.filters.InternshipFilters) restricts the candidates.
+        `after` is the (distance, id) of the last result of the previous
+        page; only results ranked behind it are returned. `paged` marks
+        every page of a keyset-paged search, so approximate backends cut
+        pages in exact order and no result falls between two pages.
+        """
+        raise NotImplementedError
+
+    def search_many(self, vectors, k, profile='balanced'):
+        """
+        search() for each of `vectors`: one list of results per vector, in
+        order. Results also carry `company_name`.
+        """
+        results = [self.search(vector, k, profile=profile) for vector in vectors]
+        for found in results:
+            for internship in found:
+                internship.company_name = internship.company.company_name
+        return results
+
+    def stats(self):
+        return {'backend': self.name}
+
+
+class PgVectorIndex(VectorIndex):
+    name = 'pgvector'
+
+    def search(self, vector, k, exclude=(), company_id=None, profile='balanced', filters=None, after=None,
+               paged=False):
+        # Matches the partial HNSW index's predicate; callers show the company
+        queryset = Internship.objects.select_related('company').filter(PUBLISHED_ONLY).exclude(id__in=exclude)
+        if company_id is not None:
+            queryset = queryset.filter(company_id=company_id)
+        if filters:
+            # Part of the ANN query's WHERE clause, not applied afterwards
+            queryset = filters.apply(queryset)
+        return ann_search(queryset, vector, k, profile=profile, after=after, paged=paged)
+
+    def search_many(self, vectors, k, profile='balanced'):
+        """
+        All top-k lists in one statement: a LATERAL index scan per row of a
+        VALUES list of query vectors, joined to the internship and company
+        rows.
+        """
+        if not len(vectors):
+            return []
+        table = connection.ops.quote_name(Internship._meta.db_table)
+        company_table = connection.ops.quote_name(Internship._meta.get_field('company').related_model._meta.db_table)
+        field = connection.ops.quote_name(embedding_field())
+
+        values = ', '.join(['(%s, %s::vector)'] * len(vectors))
+        params = []
+        for position, vector in enumerate(vectors):
+            params += [position, vector_literal(vector)]
+        # The bare <#> ordering and the literal status predicate let every
+        # lateral subquery use the partial HNSW index
+        sql = f"""
+            SELECT nn.*, query.position AS query_position, company.company_name
+            FROM (VALUES {values}) AS query(position, embedding)
+            CROSS JOIN LATERAL (
+                SELECT id, title, description, company_id, {field} <#> query.embedding AS ip_distance
+                FROM {table}
+                WHERE status = 'published' AND {field} IS NOT NULL
+                ORDER BY {field} <#> query.embedding
+                LIMIT %s
+            ) AS nn
+            JOIN {company_table} AS company ON company.id = nn.company_id
+        """
+        with fetch(), hnsw_settings(connection.alias, **profile_options(profile, k)):
+            rows = list(Internship.objects.raw(sql, params + [k]))
+
+        results = [[] for _ in vectors]
+        for internship in rows:
+            internship.distance = 1 + internship.ip_distance
+            internship.similarity = -internship.ip_distance
+            results[internship.query_position].append(internship)
+        for found in results:
+            # relaxed_order may return neighbours slightly out of order
+            found.sort(key=lambda row: (row.distance, row.id))
+        return results
+
+
+def snapshot_version():
+    """Identifies the vectors a snapshot must hold to be used."""
+    return f"{embedding_field()}:{document_embedding_version(read_slot())}"
+
+
+def build_snapshot(path, batch_size=5000):
+    """
+    Write a snapshot of every embedded published internship under `path`.
+
+    Each build goes to a new generation directory; the `current` symlink
+    is switched atomically once it is complete, so running workers keep
+    reading the previous one until their next refresh.
+    Returns the number of vectors written.
+    """
+    field = embedding_field()
+    generation = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    target = os.path.join(path, generation)
+    os.makedirs(target)
+
+    # Like the HNSW index, only the live set; postings published later
+    # reach the overlay through their updated_at
+    queryset = Internship.objects.filter(PUBLISHED_ONLY).exclude(**{f'{field}__isnull': True})
+    # Rows updated from here on are picked up by the overlay
+    watermark = Internship.objects.aggregate(latest=Max('updated_at'))['latest']
+    count = queryset.count()
+
+    vectors = np.lib.format.open_memmap(
+        os.path.join(target, 'vectors.npy'), mode='w+', dtype=np.float32, shape=(count, 384)
+    )
+    ids = np.empty(count, dtype=np.int64)
+    status = np.empty(count, dtype=np.int8)
+    company = np.empty(count, dtype=np.int64)
+
+    written = 0
+    rows = queryset.order_by('id').values_list('id', 'status', 'company_id', field)
+    for row_id, row_status, company_id, vector in rows.iterator(chunk_size=batch_size):
+        if written == count:
+            break  # rows inserted during the build wait for the overlay
+        ids[written] = row_id
+        status[written] = STATUS_CODES[row_status]
+        company[written] = company_id
+        vectors[written] = vector
+        written += 1
+    vectors.flush()
+    del vectors
+
+    np.save(os.path.join(target, 'ids.npy'), ids[:written])
+    np.save(os.path.join(target, 'status.npy'), status[:written])
+    np.save(os.path.join(target, 'company.npy'), company[:written])
+    with open(os.path.join(target, 'meta.json'), 'w') as f:
+        json.dump({
+            'version': snapshot_version(),
+            'count': written,
+            'watermark': watermark.isoformat() if watermark else None,
+        }, f)
+
+    link = os.path.join(path, 'current')
+    tmp_link = f"{link}.{generation}"
+    os.symlink(generation, tmp_link)
+    os.replace(tmp_link, link)
+    _remove_old_generations(path, keep={generation, _current_generation(path)})
+    return written
+
+
+def _current_generation(path):
+    try:
+        return os.readlink(os.path.join(path, 'current'))
+    except OSError:
+        return None
+
+
+def _remove_old_generations(path, keep):
+    # Keep the previous generation too: workers may still have it mapped
+    generations = sorted(
+        name for name in os.listdir(path)
+        if name.isdigit() and os.path.isdir(os.path.join(path, name))
+    )
+    for name in generations[:-2]:
+        if name not in keep:
+            shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+
+
+class _Snapshot:
+    """Immutable view of a snapshot plus the overlay of rows changed since."""
+
+    def __init__(self, generation, vectors, ids, status, company, watermark):
+        self.generation = generation
+        self.vectors = vectors
+        self.ids = ids
+        self.status = status
+        self.company = company
+        self.watermark = watermark
+        # Snapshot rows superseded by the overlay
+        self.stale = np.zeros(len(ids), dtype=bool)
+        self.overlay = {}  # id -> (vector, status code, company id)
+        self.overlay_vectors = np.empty((0, vectors.shape[1]), dtype=np.float32)
+        self.overlay_ids = np.empty(0, dtype=np.int64)
+        self.overlay_status = np.empty(0, dtype=np.int8)
+        self.overlay_company = np.empty(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path):
+        generation = _current_generation(path)
+        if generation is None:
+            return None
+        directory = os.path.join(path, generation)
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != snapshot_version():
+            logger.warning(
+                "Vector index snapshot %s holds %s, expected %s; rebuild it",
+                directory, meta['version'], snapshot_version()
+            )
+            return None
+        watermark = meta['watermark'] and datetime.fromisoformat(meta['watermark'])
+        return cls(
+            generation,
+            # Rows deleted during the build leave unused rows at the end
+            np.load(os.path.join(directory, 'vectors.npy'), mmap_mode='r')[:meta['count']],
+            np.load(os.path.join(directory, 'ids.npy')),
+            np.load(os.path.join(directory, 'status.npy')),
+            np.load(os.path.join(directory, 'company.npy')),
+            watermark
+        )
+
+    def with_changes(self, rows):
+        """Copy of this snapshot with the changed (id, status, company, vector, updated_at) rows applied."""
+        changed = _Snapshot.__new__(_Snapshot)
+        changed.__dict__.update(self.__dict__)
+        changed.stale = self.stale.copy()
+        changed.overlay = dict(self.overlay)
+
+        for row_id, row_status, company_id, vector, updated_at in rows:
+            position = np.searchsorted(self.ids, row_id)
+            if position < len(self.ids) and self.ids[position] == row_id:
+                changed.stale[position] = True
+            if vector is None or row_status != 'published':
+                changed.overlay.pop(row_id, None)
+            else:
+                changed.overlay[row_id] = (vector, STATUS_CODES[row_status], company_id)
+            changed.watermark = max(changed.watermark or updated_at, updated_at)
+
+        entries = list(changed.overlay.items())
+        if entries:
+            changed.overlay_vectors = np.array([entry[0] for _, entry in entries], dtype=np.float32)
+            changed.overlay_ids = np.array([row_id for row_id, _ in entries], dtype=np.int64)
+            changed.overlay_status = np.array([entry[1] for _, entry in entries], dtype=np.int8)
+            changed.overlay_company = np.array([entry[2] for _, entry in entries], dtype=np.int64)
+        return changed
+
+    def top_k(self, vector, k, exclude, company_id, after=None):
+        """(ids, similarities) of the k best published rows ranked behind `after`, best first."""
+        ids = np.concatenate([self.ids, self.overlay_ids])
+        scores = np.concatenate([self.vectors @ vector, self.overlay_vectors @ vector])
+        mask = np.concatenate([self.status, self.overlay_status]) == PUBLISHED
+        mask[:len(self.ids)] &= ~self.stale
+        if company_id is not None:
+            mask &= np.concatenate([self.company, self.overlay_company]) == company_id
+        if exclude:
+            mask &= ~np.isin(ids, list(exclude))
+        if after is not None:
+            # Same arithmetic as the distances search() reports
+            distance, last_id = after
+            distances = 1 - scores.astype(np.float64)
+            mask &= (distances > distance) | ((distances == distance) & (ids > last_id))
+
+        candidates = np.flatnonzero(mask)
+        k = min(k, len(candidates))
+        if k == 0:
+            return [], []
+        candidate_scores = scores[candidates]
+        if k < len(candidates):
+            best = np.argpartition(-candidate_scores, k - 1)[:k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.lexsort((ids[candidates[best]], -candidate_scores[best]))]
+        return ids[candidates[best]].tolist(), candidate_scores[best].tolist()
+
+
+class NumpyVectorIndex(VectorIndex):
+    name = 'numpy'
+
+    def __init__(self, path, refresh_interval=5.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.snapshot = None
+        self.checked_at = 0.0
+        self.fallback = PgVectorIndex()
+        self.lock = threading.Lock()
+        self.refreshes = 0
+
+    def refresh(self, force=False):
+        """Switch to a new snapshot generation if there is one, then poll for changed rows."""
+        if not force and time.monotonic() - self.checked_at < self.refresh_interval:
+            return
+        # One thread refreshes; the others keep searching the current state
+        if not self.lock.acquire(blocking=force):
+            return
+        try:
+            self.checked_at = time.monotonic()
+            snapshot = self.snapshot
+            if snapshot is None or snapshot.generation != _current_generation(self.path):
+                snapshot = _Snapshot.load(self.path)
+            if snapshot is None:
+                self.snapshot = None
+                return
+
+            field = embedding_field()
+            changed = Internship.objects.all()
+            if snapshot.watermark:
+                changed = changed.filter(updated_at__gt=snapshot.watermark - REFRESH_OVERLAP)
+            rows = list(changed.values_list('id', 'status', 'company_id', field, 'updated_at'))
+            if rows:
+                snapshot = snapshot.with_changes(rows)
+            self.snapshot = snapshot
+            self.refreshes += 1
+        finally:
+            self.lock.release()
+
+    def search(self, vector, k, exclude=(), company_id=None, profile='balanced', filters=None, after=None,
+               paged=False):
+        # top_k() is exact, so `paged` only matters to the fallback
+        if filters:
+            # The snapshot only knows status and company
+            return self.fallback.search(vector, k, exclude, company_id, profile, filters, after, paged)
+        with fetch():
+            self.refresh()
+        snapshot = self.snapshot
+        if snapshot is None:
+            return self.fallback.search(vector, k, exclude, company_id, profile, after=after, paged=paged)
+
+        vector = np.asarray(vector, dtype=np.float32)
+        with stage('ann'):
+            ids, similarities = snapshot.top_k(vector, k + OVERFETCH, set(exclude), company_id, after)
+        with fetch():
+            internships = Internship.objects.select_related('company').in_bulk(ids)
+
+        results = []
+        for row_id, similarity in zip(ids, similarities):
+            internship = internships.get(row_id)
+            if internship is None or internship.status != 'published':
+                continue  # deleted or unpublished since the last refresh
+            internship.similarity = similarity
+            internship.distance = 1 - similarity
+            results.append(internship)
+        return results[:k]
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            'backend': self.name,
+            'generation': snapshot and snapshot.generation,
+            'vectors': len(snapshot.ids) if snapshot else 0,
+            'overlay': len(snapshot.overlay) if snapshot else 0,
+            'watermark': snapshot.watermark.isoformat() if snapshot and snapshot.watermark else None,
+            'refreshes': self.refreshes,
+        }
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if settings.VECTOR_INDEX_BACKEND == 'numpy':
+                    _index = NumpyVectorIndex(
+                        settings.VECTOR_INDEX_PATH,
+                        refresh_interval=settings.VECTOR_INDEX_REFRESH_SECONDS
+                    )
+                else:
+                    _index = PgVectorIndex()
+    return _index
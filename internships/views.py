@@ -1,19 +1,22 @@
+import hashlib
+import json
 from datetime import timezone
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from users.decorators import authenticate_token, strict_body_to_json, role_required
+from profiles.decorators import admin_required
 from .models import Internship, Application, Interview, Evaluation
 from .serializers import EvaluationSerializer
 from users.models import User
 from django.core.exceptions import ValidationError
-from django.core.validators import validate_integer, DecimalValidator
+from django.core.validators import validate_integer
 from .pagination import CustomPagination
-from pgvector.django import (
-    MaxInnerProduct,  # For cosine similarity when vectors normalized
-    CosineDistance,  # For cosine distance
-)
-import numpy as np
+from .filters import LOCATION_TYPES, parse_filters
+from .diversity import candidates as diversity_candidates, diversify_options, rerank
+from .timing import fetch, stage
+from .utils import embedding_field
+from .vector_index import get_vector_index, snapshot_version
 
 
 @authenticate_token
@@ -21,7 +24,10 @@ import numpy as np
 @require_http_methods(["GET"])
 def list_internships(request):
     try:
-        from django.db.models import Q
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+        from django.db.models import F
+        from django.utils.timezone import now
+        from . import result_cache
         
         # Validate pagination parameters
         page_size = request.GET.get('page_size', 20)
@@ -34,103 +40,56 @@ def list_internships(request):
         except ValidationError as e:
             return JsonResponse({'success': False, 'error': str(e)}, status=400)
 
+        # Identical listings are served from the result cache until an
+        # internship changes (pagination links embed the host; deadlines the date)
+        cache_key, cached_response = result_cache.lookup('list_internships', {
+            'params': sorted(request.GET.lists()),
+            'host': request.get_host(),
+            'today': now().date(),
+        })
+        if cached_response is not None:
+            return JsonResponse(cached_response)
+
         # Initialize base queryset
         queryset = Internship.objects.filter(status='published').select_related('company')
         
-        # Initialize filter conditions
-        filters = Q()
-        
-        # 1. Location Filter (supports exact, contains, and remote)
-        location = request.GET.get('location')
-        if location:
-            if location.lower() == 'remote':
-                filters &= Q(remote_option=True)
-            elif location.startswith('"') and location.endswith('"'):
-                # Exact match for quoted locations (e.g., "New York")
-                filters &= Q(location__iexact=location.strip('"'))
-            else:
-                # Contains search for unquoted locations
-                filters &= Q(location__icontains=location)
-        
-        # 2. Duration Filter (min and max)
-        min_duration = request.GET.get('min_duration')
-        max_duration = request.GET.get('max_duration')
-        if min_duration or max_duration:
-            try:
-                if min_duration:
-                    validate_integer(min_duration)
-                    filters &= Q(duration_months__gte=int(min_duration))
-                if max_duration:
-                    validate_integer(max_duration)
-                    filters &= Q(duration_months__lte=int(max_duration))
-            except ValidationError:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Duration must be a positive integer'
-                }, status=400)
-        
-        # 3. Salary/Paid Status Filter
-        is_paid = request.GET.get('is_paid')
-        if is_paid and is_paid.lower() in ['true', 'false']:
-            filters &= Q(is_paid=(is_paid.lower() == 'true'))
-        
-        min_salary = request.GET.get('min_salary')
-        if min_salary:
-            try:
-                DecimalValidator(10, 2)(min_salary)
-                filters &= Q(salary__gte=float(min_salary))
-            except ValidationError:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Minimum salary must be a valid number'
-                }, status=400)
-        
-        # 4. Company Filter
-        company_id = request.GET.get('company_id')
-        if company_id:
-            try:
-                validate_integer(company_id)
-                filters &= Q(company_id=int(company_id))
-            except ValidationError:
-                return JsonResponse({
-                    'success': False,
-                    'error': 'Invalid company ID'
-                }, status=400)
-        
-        # 5. Remote Filter (can be combined with location)
-        remote_only = request.GET.get('remote_only')
-        if remote_only and remote_only.lower() == 'true':
-            filters &= Q(remote_option=True)
-        
-        # 6. Deadline Filter (upcoming or all)
-        upcoming_only = request.GET.get('upcoming_only')
-        if upcoming_only and upcoming_only.lower() == 'true':
-            from django.utils import timezone
-            filters &= Q(application_deadline__gte=timezone.now().date())
+        # Location, duration, salary, company, remote and deadline filters
+        try:
+            filters = parse_filters(request.GET)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+        queryset = filters.apply(queryset)
+        fuzzy_location = bool(filters.fuzzy_location)
         
-        # 7. Keyword Search (title/description)
+        # Keyword Search (title/requirements/description, full-text)
         search_term = request.GET.get('search')
         if search_term:
-            filters &= (
-                Q(title__icontains=search_term) |
-                Q(description__icontains=search_term) |
-                Q(requirements__icontains=search_term)
+            # Served by the GIN index on the generated search_vector column
+            search_query = SearchQuery(search_term, search_type='websearch', config='simple')
+            queryset = queryset.filter(search_vector=search_query).annotate(
+                rank=SearchRank(F('search_vector'), search_query)
             )
         
-        # Apply all filters
-        queryset = queryset.filter(filters)
-        
-        # 8. Sorting
-        sort_by = request.GET.get('sort_by', '-created_at')
+        # Sorting (keyword and fuzzy location searches default to relevance)
+        sort_by = request.GET.get('sort_by', 'relevance' if search_term or fuzzy_location else '-created_at')
         valid_sort_options = {
             'recent': '-created_at',
             'deadline': 'application_deadline',
             'salary': '-salary',
             'duration': '-duration_months',
-            'title': 'title'
+            'title': 'title',
+            'relevance': '-rank'
         }
         sort_field = valid_sort_options.get(sort_by.lower(), '-created_at')
-        queryset = queryset.order_by(sort_field)
+        if sort_field == '-rank':
+            relevance = []
+            if search_term:
+                relevance.append('-rank')
+            if fuzzy_location:
+                relevance.append('-location_similarity')
+            queryset = queryset.order_by(*relevance, '-created_at')
+        else:
+            queryset = queryset.order_by(sort_field)
         
         # Paginate results
         paginator = CustomPagination()
@@ -163,9 +122,10 @@ def list_internships(request):
             'applied': {k: v for k, v in request.GET.items() if k != 'page_size'},
             'available': {
                 'sort_options': list(valid_sort_options.keys()),
-                'location_types': ['exact match (use quotes)', 'contains', 'remote']
+                'location_types': LOCATION_TYPES
             }
         }
+        result_cache.store(cache_key, response_data)
         
         return JsonResponse(response_data)
     
@@ -517,22 +477,59 @@ def get_saved_internships(request):
 @require_http_methods(["GET"])
 def internship_detail(request, internship_id):
     try:
-        internship = Internship.objects.select_related('company').get(
-            id=internship_id,
-            status='published'  # Only show published internships
-        )
+        with fetch():
+            internship = Internship.objects.select_related('company').get(
+                id=internship_id,
+                status='published'  # Only show published internships
+            )
 
-        if internship.embedding is None or len(internship.embedding) == 0:
-            internship.update_embedding()
+        try:
+            diversity = diversify_options(request.GET)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'message': e.messages[0]}, status=400)
+        # Diversified: re-rank a longer candidate list down to three
+        limit = diversity_candidates(3) if diversity else 3
+
+        # Precomputed by internships.knn: one indexed lookup
+        neighbours = internship.neighbours.filter(
+            similar__status='published'
+        ).select_related('similar__company').order_by('-score')[:limit]
+        similar_internships = []
+        with fetch():
+            for neighbour in neighbours:
+                neighbour.similar.distance = 1 - neighbour.score
+                similar_internships.append(neighbour.similar)
+
+        field = embedding_field()
+        if not similar_internships:
+            # Not in the graph yet (e.g. published moments ago): search live
+            if getattr(internship, field) is None or len(getattr(internship, field)) == 0:
+                with stage('embed'):
+                    internship.update_embedding()
+            similar_internships = get_vector_index().search(
+                getattr(internship, field),
+                limit,
+                exclude=[internship.id],
+                profile='fast'
+            )
 
-        similar_internships = Internship.objects.filter(
-            status='published'
-        ).exclude(
-            id=internship.id
-        ).annotate(
-            similarity=CosineDistance('embedding', internship.embedding),
-        ).order_by('similarity')[:3]
+        diversity_report = None
+        if diversity and similar_internships:
+            candidate_count = len(similar_internships)
+            similar_internships, rerank_ms = rerank(getattr(internship, field), similar_internships, 3, diversity)
+            diversity_report = dict(diversity, candidates=candidate_count, rerank_ms=round(rerank_ms, 3))
         
+        with stage('serialize'):
+            similar = [{
+                'id': similar_internship.id,
+                'title': similar_internship.title,
+                'similarity': similar_internship.distance,
+                'company': {
+                    'id': similar_internship.company.id,
+                    'name': similar_internship.company.company_name,
+                }
+            } for similar_internship in similar_internships]
+
         response_data = {
             'id': internship.id,
             'title': internship.title,
@@ -555,16 +552,10 @@ def internship_detail(request, internship_id):
             'deadline': internship.application_deadline.isoformat(),
             'created_at': internship.created_at.isoformat(),
             'coordinates': internship.coordinates,
-            'similar_internships': [{
-                'id': similar_internship.id,
-                'title': similar_internship.title,
-                'similarity': similar_internship.similarity,
-                'company': {
-                    'id': similar_internship.company.id,
-                    'name': similar_internship.company.company_name,
-                }
-            } for similar_internship in similar_internships],
+            'similar_internships': similar,
         }
+        if diversity_report:
+            response_data['similar_internships_diversity'] = diversity_report
         
         # Add application status if user is student
         if request._user.role == 'student':
@@ -577,10 +568,11 @@ def internship_detail(request, internship_id):
             except Application.DoesNotExist:
                 response_data['application_status'] = 'not_applied'
         
-        return JsonResponse({
-            'success': True,
-            'internship': response_data
-        })
+        with stage('serialize'):
+            return JsonResponse({
+                'success': True,
+                'internship': response_data
+            })
         
     except Internship.DoesNotExist:
         return JsonResponse({
@@ -839,35 +831,108 @@ def update_application_status(request, application_id):
 @strict_body_to_json
 def semantic_search(request):
     try:
-        from .utils import generate_embedding  # Local import
+        from django.conf import settings
+        from .pagination import decode_cursor, encode_cursor
+        from .result_cache import cached
+        from .utils import embed_query, normalize_query  # Local import
         
         query = request.parsed_data.get('query', '')
-        print(f"Query: '{query}' (Length: {len(query)})")  # Check for empty/malformed input
-        query_embedding = generate_embedding(query)
-        print(f"Embedding shape: {len(query_embedding)}")  # Verify vector dimensions
-        
-        results = Internship.objects.filter(
-            status='published'
-        ).annotate(
-            similarity=CosineDistance('embedding', query_embedding)
-        ).order_by('similarity')[:20]
-    
-        serialized = [{
-            'id': i.id,
-            'title': i.title,
-            'company': {
-                "id": i.company.id,
-                "name": i.company.company_name,
-            },
-            'description': i.description,
-            'score': i.similarity
-        } for i in results]
+
+        # Same filters as list_internships, applied inside the vector search
+        try:
+            filters = parse_filters(request.parsed_data)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+        profile = 'filtered' if filters else 'balanced'
+
+        # Optional MMR re-rank of an over-fetched candidate list
+        try:
+            diversity = diversify_options(request.parsed_data)
+        except ValidationError as e:
+            return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+        if diversity and request.parsed_data.get('cursor'):
+            return JsonResponse({'success': False, 'error': 'Diversified results have a single page'}, status=400)
+
+        # Vectors from another model rank differently: part of the key
+        search_params = {
+            'query': normalize_query(query),
+            'filters': filters.params,
+            'diversity': diversity,
+            'vectors': snapshot_version()
+        }
+        search_id = hashlib.sha256(json.dumps(search_params, sort_keys=True).encode()).hexdigest()[:16]
+
+        # Keyset pagination: the cursor holds the (distance, id) of the last
+        # result served and how many results came before
+        try:
+            page_size = int(request.parsed_data.get('page_size', 20))
+            if page_size < 1 or page_size > 50:
+                raise ValueError
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Page size must be between 1 and 50'}, status=400)
+        after, depth = None, 0
+        if request.parsed_data.get('cursor'):
+            try:
+                position = decode_cursor(str(request.parsed_data['cursor']))
+                if position.get('s') != search_id:
+                    raise ValidationError('Cursor belongs to another search')
+                after, depth = (float(position['d']), int(position['i'])), int(position['n'])
+                if depth < 0:
+                    raise ValueError
+            except ValidationError as e:
+                return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+            except (KeyError, TypeError, ValueError):
+                return JsonResponse({'success': False, 'error': 'Invalid cursor'}, status=400)
+        page_size = max(0, min(page_size, settings.SEMANTIC_SEARCH_MAX_DEPTH - depth))
+
+        def search():
+            if not page_size:
+                return [], None, None
+            query_embedding = embed_query(query)
+            next_cursor = report = None
+            if diversity:
+                found = get_vector_index().search(
+                    query_embedding, diversity_candidates(page_size), profile=profile, filters=filters
+                )
+                results, rerank_ms = rerank(query_embedding, found, page_size, diversity)
+                report = dict(diversity, candidates=len(found), rerank_ms=round(rerank_ms, 3))
+            else:
+                results = get_vector_index().search(
+                    query_embedding, page_size, profile=profile, filters=filters, after=after, paged=True
+                )
+                served = depth + len(results)
+                if len(results) == page_size and served < settings.SEMANTIC_SEARCH_MAX_DEPTH:
+                    last = results[-1]
+                    next_cursor = encode_cursor({'s': search_id, 'd': last.distance, 'i': last.id, 'n': served})
+            with stage('serialize'):
+                serialized = [{
+                    'id': i.id,
+                    'title': i.title,
+                    'company': {
+                        "id": i.company.id,
+                        "name": i.company.company_name,
+                    },
+                    'description': i.description,
+                    'score': i.distance
+                } for i in results]
+            return serialized, next_cursor, report
+
+        serialized, next_cursor, report = cached(
+            'semantic_search',
+            dict(search_params, after=after, page_size=page_size),
+            search
+        )
         
-        return JsonResponse({
+        response = {
             'success': True,
             'results': serialized,
-            'count': len(serialized)
-        })
+            'count': len(serialized),
+            'next_cursor': next_cursor
+        }
+        if report:
+            response['diversity'] = report
+        with stage('serialize'):
+            return JsonResponse(response)
         
     except Exception as e:
         return JsonResponse({
@@ -876,55 +941,142 @@ def semantic_search(request):
         }, status=500)
 
 
+# Several semantic searches at once, e.g. one per saved interest on a dashboard
+@authenticate_token
+@csrf_exempt
+@require_http_methods(["POST"])
+@strict_body_to_json
+def batch_semantic_search(request):
+    try:
+        from .utils import embed_queries  # Local import
+
+        queries = request.parsed_data.get('queries')
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            return JsonResponse({'success': False, 'error': 'queries must be a list of strings'}, status=400)
+        if not 1 <= len(queries) <= 20:
+            return JsonResponse({'success': False, 'error': 'Between 1 and 20 queries per batch'}, status=400)
+        try:
+            limit = int(request.parsed_data.get('limit', 10))
+            if limit < 1 or limit > 20:
+                raise ValueError
+        except (TypeError, ValueError):
+            return JsonResponse({'success': False, 'error': 'Limit must be between 1 and 20'}, status=400)
+
+        # One model call for the cache misses, one statement for every top-k list
+        queries = list(dict.fromkeys(queries))
+        found = get_vector_index().search_many(embed_queries(queries), limit, profile='balanced')
+
+        with stage('serialize'):
+            return JsonResponse({
+                'success': True,
+                'results': {
+                    query: [{
+                        'id': i.id,
+                        'title': i.title,
+                        'company': {
+                            "id": i.company_id,
+                            "name": i.company_name,
+                        },
+                        'description': i.description,
+                        'score': i.distance
+                    } for i in internships]
+                    for query, internships in zip(queries, found)
+                }
+            })
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
 # Combine semantic and keyword search
 @authenticate_token
 @csrf_exempt
 @require_http_methods(["POST"])
 @strict_body_to_json
 def hybrid_search(request):
-    from django.db.models import Q
-    from .utils import generate_embedding  # Local import
+    from .hybrid import hybrid_search as search
+    from .result_cache import cached
+    from .utils import embed_query, normalize_query  # Local import
 
     query = request.parsed_data.get('query', '')
-    
-    # Keyword filters
-    filters = Q(status='published')
-    if request.parsed_data.get('location'):
-        filters &= Q(location__icontains=request.parsed_data['location'])
-    
-    # Semantic part
-    query_embedding = generate_embedding(query)
-    
-    results = Internship.objects.filter(filters).annotate(
-        similarity=1 - MaxInnerProduct('embedding', query_embedding)
-    ).order_by('similarity')[:20]
-    
-    serialized = [{
-        'id': i.id,
-        'title': i.title,
-        'company': i.company.company_name,
-        'description': i.description[:200] + '...' if i.description else '',
-        'score': float(1 / (1 + np.exp(i.similarity)))  # Convert distance to 0-1 score
-    } for i in results]
-    
-    return JsonResponse({
+    location = request.parsed_data.get('location') or None
+    if not isinstance(query, str):
+        return JsonResponse({'success': False, 'error': 'Query must be a string'}, status=400)
+    if location is not None and not isinstance(location, str):
+        return JsonResponse({'success': False, 'error': 'Location must be a string'}, status=400)
+    debug = bool(request.parsed_data.get('debug'))
+    try:
+        diversity = diversify_options(request.parsed_data)
+    except ValidationError as e:
+        return JsonResponse({'success': False, 'error': e.messages[0]}, status=400)
+
+    def fuse():
+        # Full-text and vector candidates fused by reciprocal rank (see internships.hybrid)
+        query_embedding = embed_query(query)
+        report = None
+        if diversity:
+            found = search(query, query_embedding, limit=diversity_candidates(20), location=location)
+            # The fused score is the relevance MMR trades off
+            top = float(found[0].score) if found else 1.0
+            results, rerank_ms = rerank(
+                query_embedding, found, 20, diversity,
+                relevance=[float(i.score) / top for i in found]
+            )
+            report = dict(diversity, candidates=len(found), rerank_ms=round(rerank_ms, 3))
+        else:
+            results = search(query, query_embedding, limit=20, location=location)
+
+        serialized = []
+        with stage('serialize'):
+            for i in results:
+                item = {
+                    'id': i.id,
+                    'title': i.title,
+                    'company': i.company_name,
+                    'description': i.description[:200] + '...' if i.description else '',
+                    'score': float(i.score)
+                }
+                if debug:
+                    item['signals'] = {
+                        'keyword': i.keyword_rank and {'rank': i.keyword_rank, 'score': i.keyword_score},
+                        'semantic': i.semantic_rank and {'rank': i.semantic_rank, 'similarity': i.semantic_score},
+                    }
+                serialized.append(item)
+        return serialized, report
+
+    serialized, report = cached('hybrid_search', {
+        'query': normalize_query(query),
+        'location': normalize_query(location),
+        'debug': debug,
+        'diversity': diversity,
+        'vectors': snapshot_version(),
+    }, fuse)
+
+    response = {
         'success': True,
         'results': serialized,
         'count': len(serialized)
-    })
+    }
+    if report:
+        response['diversity'] = report
+    with stage('serialize'):
+        return JsonResponse(response)
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
 @strict_body_to_json
 def get_embedding(request):
-    from .utils import generate_embedding  # Local import
+    from .utils import embed_query  # Local import
 
     
     query = request.parsed_data.get('q', '')
 
     # Semantic part
-    query_embedding = generate_embedding(query)
+    query_embedding = embed_query(query)
 
     return JsonResponse({
         'success': True,
@@ -933,6 +1085,19 @@ def get_embedding(request):
     })
 
 
+@authenticate_token
+@admin_required
+@csrf_exempt
+@require_http_methods(["GET"])
+def embedding_stats(request):
+    from .utils import embedding_stats as get_embedding_stats  # Local import
+
+    return JsonResponse({
+        'success': True,
+        'stats': get_embedding_stats()
+    })
+
+
 # Interview Scheduling
 @authenticate_token
 @role_required('company')
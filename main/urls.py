@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="index"),
-]
\ No newline at end of file
+    path("ready/", views.ready, name="ready"),
+]
@@ -1,7 +1,20 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_http_methods
 
 # Create your views here.
 def index(request):
     return render(request, 'index.html')
-    return HttpResponse("Hello, word. You're at the main index.")
\ No newline at end of file
+    return HttpResponse("Hello, word. You're at the main index.")
+
+@require_http_methods(["GET"])
+def ready(request):
+    """Readiness probe: healthy only once the embedding model is loaded"""
+    from internships.utils import is_model_ready, start_background_preload
+
+    if not is_model_ready():
+        # Without EMBEDDING_PRELOAD nothing has loaded the model yet
+        start_background_preload()
+        return JsonResponse({'success': False, 'model_loaded': False}, status=503)
+
+    return JsonResponse({'success': True, 'model_loaded': True})
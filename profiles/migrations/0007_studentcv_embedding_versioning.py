@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-17 11:40
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0006_studentprofile_saved_internships'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='studentcv',
+            name='embedding_version',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddField(
+            model_name='studentcv',
+            name='embedding_next',
+            field=pgvector.django.vector.VectorField(blank=True, dimensions=384, null=True),
+        ),
+        migrations.AddField(
+            model_name='studentcv',
+            name='embedding_next_version',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-17 12:30
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0007_studentcv_embedding_versioning'),
+        ('internships', '0009_internship_embedding_ip_hnsw'),  # creates the vector extension
+    ]
+
+    operations = [
+        # CV vectors are compared by inner product with unit-length queries
+        migrations.RunSQL(
+            """
+            UPDATE profiles_studentcv SET embedding = l2_normalize(embedding)
+            WHERE embedding IS NOT NULL;
+            UPDATE profiles_studentcv SET embedding_next = l2_normalize(embedding_next)
+            WHERE embedding_next IS NOT NULL;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2 on 2026-10-17 15:10
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0008_studentcv_normalize_embeddings'),
+        ('internships', '0012_internship_trigram_indexes'),  # creates the pg_trgm extension
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='companyprofile',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('company_name'), name='gin_trgm_ops'), name='company_name_trgm'),
+        ),
+    ]
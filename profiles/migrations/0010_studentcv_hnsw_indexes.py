@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-17 17:20
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0009_companyprofile_company_name_trgm'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='studentcv',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding'], m=16, name='studentcv_embedding_ip_hnsw', opclasses=['vector_ip_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='studentcv',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('is_default', True)), ef_construction=64, fields=['embedding'], m=16, name='studentcv_default_ip_hnsw', opclasses=['vector_ip_ops']),
+        ),
+        AddIndexConcurrently(
+            model_name='studentcv',
+            index=pgvector.django.indexes.HnswIndex(condition=models.Q(('is_default', True)), ef_construction=64, fields=['embedding_next'], m=16, name='studentcv_next_default_hnsw', opclasses=['vector_ip_ops']),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2 on 2026-10-17 19:40
+
+import pgvector.django.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('profiles', '0010_studentcv_hnsw_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='studentcv',
+            index=pgvector.django.indexes.HnswIndex(ef_construction=64, fields=['embedding_next'], m=16, name='studentcv_next_ip_hnsw', opclasses=['vector_ip_ops']),
+        ),
+    ]
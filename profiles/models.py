@@ -1,6 +1,8 @@
 from django.db import models
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.db.models.functions import Upper
 from django.core.validators import MinValueValidator, MaxValueValidator, RegexValidator
-from pgvector.django import VectorField
+from pgvector.django import HnswIndex, VectorField
 from users.models import User
 
 class StudentProfile(models.Model):
@@ -150,6 +152,12 @@ class CompanyProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves company_name__icontains (admin and internship search)
+            GinIndex(OpClass(Upper('company_name'), name='gin_trgm_ops'), name='company_name_trgm'),
+        ]
+
     def __str__(self):
         return f"{self.company_name}'s Profile"
 
@@ -164,18 +172,63 @@ class StudentCV(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_default = models.BooleanField(default=False)
     embedding = VectorField(dimensions=384, null=True, blank=True)  # For storing embeddings
+    embedding_version = models.CharField(max_length=200, blank=True, default='')
+    # Shadow vector from the model being migrated to (EMBEDDING_NEXT_MODEL_NAME)
+    embedding_next = VectorField(dimensions=384, null=True, blank=True)
+    embedding_next_version = models.CharField(max_length=200, blank=True, default='')
+
+    class Meta:
+        indexes = [
+            # Unit vectors, inner-product ordering (see internships.search).
+            # Admins search every CV; companies only default CVs, through the
+            # partial indexes (talent search filters on is_default=True).
+            # embedding_next gets the same pair so either column can serve
+            # searches during a model migration
+            HnswIndex(
+                name='studentcv_embedding_ip_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops']
+            ),
+            HnswIndex(
+                name='studentcv_next_ip_hnsw',
+                fields=['embedding_next'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops']
+            ),
+            HnswIndex(
+                name='studentcv_default_ip_hnsw',
+                fields=['embedding'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops'],
+                condition=models.Q(is_default=True)
+            ),
+            HnswIndex(
+                name='studentcv_next_default_hnsw',
+                fields=['embedding_next'],
+                m=16,
+                ef_construction=64,
+                opclasses=['vector_ip_ops'],
+                condition=models.Q(is_default=True)
+            ),
+        ]
 
     def update_embedding(self):
         """Generate embedding from CV content"""
-        from internships.utils import generate_embedding
+        from internships.embedding_store import assign_embeddings
+        self.save(update_fields=assign_embeddings(self, self.get_search_text()))
+
+    def get_search_text(self):
         text_parts = [
             self.title,
             ' '.join(self.skills),
             self.education_text(),
             self.experience_text()
         ]
-        self.embedding = generate_embedding(' '.join(text_parts))
-        self.save()
+        return ' '.join(text_parts)
     
     def education_text(self):
         return ' '.join([
@@ -283,7 +336,9 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 
 @receiver(post_save, sender=StudentCV)
-def update_cv_embedding(sender, instance, **kwargs):
-    #if any(field in kwargs.get('update_fields', []) 
-           #for field in ['title', 'skills', 'experience']):
+def update_cv_embedding(sender, instance, update_fields=None, **kwargs):
+    from internships.embedding_store import EMBEDDING_FIELDS  # Local import to avoid circular imports
+    # update_embedding() saves the embedding itself; don't recurse on that write
+    if update_fields and set(update_fields) <= EMBEDDING_FIELDS:
+        return
     instance.update_embedding()
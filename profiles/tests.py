@@ -1,9 +1,13 @@
 from datetime import timezone
-from django.test import TestCase, Client
+from unittest import mock
+import numpy as np
+from django.db import connection
+from django.test import TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from users.models import User
-from .models import StudentProfile, CompanyProfile
+from users.models import Session, User
+from .models import StudentProfile, CompanyProfile, StudentCV
 from .views import serialize_company_profile, serialize_student_profile
 import json
 
@@ -223,4 +227,107 @@ class ProfileTests(TestCase):
                 reverse('profile_by_id', args=[1]),
                 **self._auth_headers(self.admin_token)
             )
-            self.assertEqual(response.status_code, 200)
\ No newline at end of file
+            self.assertEqual(response.status_code, 200)
+
+
+@mock.patch('internships.embedding_store.generate_document_embeddings',
+            side_effect=lambda texts, slot=None: np.ones((len(texts), 384), dtype=np.float32) / np.sqrt(384))
+class CVSearchTests(TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(0)
+        company = User.objects.create(email='company@test.com', role='company')
+        CompanyProfile.objects.create(user=company, company_name="Test Corp")
+        self.company_headers = self.headers(company)
+        self.admin_headers = self.headers(User.objects.create(email='admin@test.com', role='admin'))
+        # With a profile, so ProfileCompletionMiddleware lets the student through
+        student = User.objects.create(email='student@test.com', role='student')
+        StudentProfile.objects.create(user=student)
+        self.student_headers = self.headers(student)
+
+    def headers(self, user):
+        return {'HTTP_AUTHORIZATION': f'Bearer {Session.create_session(user).token}'}
+
+    def create_cv(self, email, skills=("Python",), year=2026, status='active', default=True):
+        user = User.objects.create(email=email, role='student', first_name=email.split('@')[0], last_name='Student')
+        StudentProfile.objects.create(user=user, graduation_year=year, search_status=status)
+        cv = StudentCV.objects.create(user=user, title="CV", skills=list(skills), is_default=default)
+        vector = self.rng.normal(size=384)
+        StudentCV.objects.filter(pk=cv.pk).update(embedding=list(vector / np.linalg.norm(vector)))
+        return cv
+
+    def search(self, headers, **data):
+        with mock.patch('internships.utils.embed_query', return_value=np.ones(384) / np.sqrt(384)):
+            return self.client.post(reverse('search-cvs'), {'query': "python", **data},
+                                    content_type='application/json', **headers)
+
+    def ids(self, response):
+        return sorted(result['id'] for result in response.json()['results'])
+
+    def test_companies_only_see_default_cvs_of_students_open_to_offers(self, generate):
+        visible = self.create_cv('open@test.com')
+        passive = self.create_cv('passive@test.com', status='passive')
+        hidden = [
+            self.create_cv('closed@test.com', status='not_looking'),
+            self.create_cv('draft@test.com', default=False),
+        ]
+
+        self.assertEqual(self.ids(self.search(self.company_headers)), sorted([visible.id, passive.id]))
+        self.assertEqual(
+            self.ids(self.search(self.admin_headers)),
+            sorted([visible.id, passive.id] + [cv.id for cv in hidden])
+        )
+        response = self.search(self.student_headers)
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response.json()['errno'], 0x70)
+        self.assertEqual(response.json()['message'], "Company or admin access only")
+
+    def test_skills_and_graduation_year_filters(self, generate):
+        match = self.create_cv('match@test.com', skills=["Python", "SQL"], year=2026)
+        self.create_cv('skills@test.com', skills=["Python"], year=2026)
+        self.create_cv('year@test.com', skills=["Python", "SQL"], year=2027)
+
+        response = self.search(self.company_headers, skills=["SQL", "Python"], graduation_year=2026)
+        self.assertEqual(self.ids(response), [match.id])
+        self.assertEqual(response.json()['results'][0]['graduation_year'], 2026)
+        self.assertEqual(self.search(self.company_headers, graduation_year="soon").status_code, 400)
+
+    def test_query_count_does_not_grow_with_results(self, generate):
+        self.create_cv('first@test.com')
+        with CaptureQueriesContext(connection) as few:
+            self.search(self.company_headers)
+        for i in range(5):
+            self.create_cv(f'more{i}@test.com')
+        with CaptureQueriesContext(connection) as many:
+            response = self.search(self.company_headers)
+
+        self.assertEqual(len(response.json()['results']), 6)
+        self.assertEqual(len(many), len(few))
+
+    def test_company_search_uses_the_partial_index(self, generate):
+        for i in range(5):
+            self.create_cv(f'student{i}@test.com')
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        with CaptureQueriesContext(connection) as queries:
+            self.search(self.company_headers)
+        sql = next(query['sql'] for query in queries if '<#>' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('studentcv_default_ip_hnsw', plan)
+
+    @override_settings(EMBEDDING_READ_NEXT=True)
+    def test_admin_search_on_the_next_column_uses_its_index(self, generate):
+        for i in range(5):
+            cv = self.create_cv(f'student{i}@test.com')
+            vector = self.rng.normal(size=384)
+            StudentCV.objects.filter(pk=cv.pk).update(embedding_next=list(vector / np.linalg.norm(vector)))
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        with CaptureQueriesContext(connection) as queries:
+            self.search(self.admin_headers)
+        sql = next(query['sql'] for query in queries if '<#>' in query['sql'])
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN {sql}")
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('studentcv_next_ip_hnsw', plan)
@@ -8,6 +8,7 @@ urlpatterns = [
 
     path('cvs/', views.list_cvs, name='list-cvs'),
     path('cvs/create/', views.create_cv, name='create-cv'),
+    path('cvs/search/', views.search_cvs, name='search-cvs'),
     path('cvs/<int:cv_id>/', views.cv_detail, name='cv-detail'),
     path('cvs/<int:cv_id>/set-default/', views.set_default_cv, name='set-default-cv'),
 ]
\ No newline at end of file
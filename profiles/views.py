@@ -316,24 +316,58 @@ def set_default_cv(request, cv_id):
 @strict_body_to_json
 def search_cvs(request):
     try:
-        from internships.utils import generate_embedding
-        from pgvector.django import CosineDistance
+        from internships.utils import embed_query
+        from internships.search import ann_search
+        from internships.timing import stage
         
+        user = request._user
+        if user.role not in ('company', 'admin'):
+            return JsonResponse({
+                "success": False,
+                "message": "Company or admin access only",
+                "errno": 0x70
+            }, status=403)
+
         query = request.parsed_data.get('query', '')
-        query_embedding = generate_embedding(query)
-        
-        cvs = StudentCV.objects.annotate(
-            similarity=1 - CosineDistance('embedding', query_embedding)
-        ).order_by('-similarity')[:20]
-        
-        results = [{
-            'id': cv.id,
-            'student_name': cv.user.get_full_name(),
-            'similarity': float(cv.similarity),
-            'top_skills': cv.skills[:5]
-        } for cv in cvs]
+
+        # One query for the CVs, their students and profiles
+        cvs = StudentCV.objects.select_related('user', 'user__student_profile')
+        if user.role == 'company':
+            # Default CVs of students open to offers; is_default=True is the
+            # predicate of the partial HNSW index
+            cvs = cvs.filter(is_default=True, user__student_profile__search_status__in=['active', 'passive'])
+
+        # Filters go into the vector query's WHERE clause
+        filtered = False
+        skills = request.parsed_data.get('skills')
+        if skills:
+            if isinstance(skills, str):
+                skills = [skill.strip() for skill in skills.split(',') if skill.strip()]
+            if not isinstance(skills, list) or not all(isinstance(skill, str) for skill in skills):
+                return JsonResponse({'success': False, 'error': 'Skills must be a list of strings'}, status=400)
+            cvs = cvs.filter(skills__contains=skills)
+            filtered = True
+
+        graduation_year = request.parsed_data.get('graduation_year')
+        if graduation_year not in (None, ''):
+            try:
+                cvs = cvs.filter(user__student_profile__graduation_year=int(graduation_year))
+            except (TypeError, ValueError):
+                return JsonResponse({'success': False, 'error': 'Graduation year must be an integer'}, status=400)
+            filtered = True
+
+        cvs = ann_search(cvs, embed_query(query), 20, profile='filtered' if filtered else 'balanced')
         
-        return JsonResponse({'success': True, 'results': results})
+        with stage('serialize'):
+            results = [{
+                'id': cv.id,
+                'student_name': cv.user.get_full_name(),
+                'similarity': float(cv.similarity),
+                'top_skills': cv.skills[:5],
+                'graduation_year': getattr(getattr(cv.user, 'student_profile', None), 'graduation_year', None)
+            } for cv in cvs]
+            
+            return JsonResponse({'success': True, 'results': results})
     
     except Exception as e:
         return JsonResponse({'success': False, 'error': str(e)}, status=500)
@@ -2,38 +2,42 @@
 from django.db.models import F
 from pgvector.django import CosineDistance
 from internships.models import Internship, Application
+from internships.vector_index import get_vector_index
+from internships.timing import fetch, stage
+from internships.utils import embedding_field
 
 def get_student_recommendations(student, limit=5):
     """
     Get personalized internship recommendations for a student
     """
-    cv = student.cvs.filter(is_default=True).first()
+    with fetch():
+        cv = student.cvs.filter(is_default=True).first()
     if not cv:
         return Internship.objects.none()
-    if not cv.embedding.all():
-        cv.update_embedding()
+    field = embedding_field()
+    if getattr(cv, field) is None:
+        with stage('embed'):
+            cv.update_embedding()
 
     
-    return Internship.objects.filter(
-        status='published'
-    ).annotate(
-        match_score=CosineDistance('embedding', cv.embedding)
-    ).order_by(
-        '-match_score',
-        '-created_at'
-    )[:limit]
+    internships = get_vector_index().search(getattr(cv, field), limit, profile='filtered')
+    # Best match first; match_score is the cosine similarity
+    for internship in internships:
+        internship.match_score = internship.similarity
+    return internships
 
 def get_candidate_recommendations(internship, limit=5):
     """
     Get top candidates for an internship
     """
-    if not internship.embedding:
+    field = embedding_field()
+    if getattr(internship, field) is None:
         return Application.objects.none()
     
     return Application.objects.filter(
         internship=internship
     ).annotate(
-        match_score=1 - CosineDistance('cv__embedding', internship.embedding)
+        match_score=1 - CosineDistance(f'cv__{field}', getattr(internship, field))
     ).select_related(
         'student', 'cv'
     ).order_by(
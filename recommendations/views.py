@@ -8,24 +8,26 @@ from users.decorators import authenticate_token, role_required
 @require_http_methods(["GET"])
 def student_recommendations(request):
     try:
+        from internships.timing import stage
         from .utils import get_student_recommendations
         
         internships = get_student_recommendations(request._user, 10)
         
-        data = [{
-            'id': i.id,
-            'title': i.title,
-            'company': {'name': i.company.company_name},
-            'location': i.location,
-            'matchScore': float(i.match_score),
-            'deadline': i.application_deadline.isoformat()
-        } for i in internships]
-        
-        return JsonResponse({
-            'success': True,
-            'recommendations': data,
-            'last_updated': request._user.last_login.isoformat()
-        })
+        with stage('serialize'):
+            data = [{
+                'id': i.id,
+                'title': i.title,
+                'company': {'name': i.company.company_name},
+                'location': i.location,
+                'matchScore': float(i.match_score),
+                'deadline': i.application_deadline.isoformat()
+            } for i in internships]
+            
+            return JsonResponse({
+                'success': True,
+                'recommendations': data,
+                'last_updated': request._user.last_login.isoformat()
+            })
         
     except Exception as e:
         return JsonResponse({